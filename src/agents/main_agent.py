@@ -14,15 +14,14 @@ from src.mcp_servers.web_search_mcp.search import search_products
 from src.mcp_servers.web_scraper_mcp.scraper import scrape_page
 from src.shared.browser import get_browser
 from src.shared.logging import get_logger, get_tracer, set_session_id
-from src.shared.models import ProductResult, SearchStatus
+from src.shared.models import ProductResult, SearchStatus, StatusCode
 
 import json
 
 from opentelemetry import trace
-from opentelemetry.trace import StatusCode
+from opentelemetry.trace import StatusCode as SpanStatusCode
 
 logger = get_logger(__name__)
-_tracer = get_tracer(__name__)
 
 StatusCallback = Callable[[str, str], Awaitable[None]]
 
@@ -40,6 +39,7 @@ class AgentState:
     results: list[ProductResult] = field(default_factory=list)
     conversation_history: list[dict[str, str]] = field(default_factory=list)
     status_messages: list[str] = field(default_factory=list)
+    status_codes: set[StatusCode] = field(default_factory=set)
 
 
 class MainAgent:
@@ -73,7 +73,9 @@ class MainAgent:
         self.state.status = SearchStatus.IN_PROGRESS
         await self._add_status("Started search...")
 
-        with _tracer.start_as_current_span(
+        # Resolved per call so importing the agent does not set up tracing
+        tracer = get_tracer(__name__)
+        with tracer.start_as_current_span(
             "process_query",
             attributes={"query": query, "market": market},
         ) as root_span:
@@ -81,7 +83,7 @@ class MainAgent:
             try:
                     # Step 1: Web search (direct HTTP — no browser needed)
                     await self._add_status("Searching the web...")
-                    with _tracer.start_as_current_span(
+                    with tracer.start_as_current_span(
                         "search_web",
                         attributes={"query": query, "language": language, "market": market},
                     ) as search_span:
@@ -99,15 +101,17 @@ class MainAgent:
                         search_span.add_event("search_web.end", {"result_count": len(search_results)})
 
                     if not search_results:
-                        root_span.set_attribute("exit_reason", "no_search_results")
-                        root_span.add_event("process_query.end", {"exit_reason": "no_search_results"})
-                        await self._add_status("No search results found")
+                        root_span.set_attribute("exit_reason", StatusCode.NO_SEARCH_RESULTS.value)
+                        root_span.add_event(
+                            "process_query.end", {"exit_reason": StatusCode.NO_SEARCH_RESULTS.value}
+                        )
+                        await self._add_status("No search results found", StatusCode.NO_SEARCH_RESULTS)
                         self.state.status = SearchStatus.COMPLETED
                         return self.state
 
                     # Step 2: Identify e-commerce sites
                     await self._add_status(f"Analyzing {len(search_results)} results...")
-                    with _tracer.start_as_current_span(
+                    with tracer.start_as_current_span(
                         "detect_ecommerce",
                         attributes={"result_count": len(search_results)},
                     ) as ecom_span:
@@ -132,9 +136,13 @@ class MainAgent:
                         ecom_span.add_event("detect_ecommerce.end", {"ecommerce_count": len(ecommerce_signals)})
 
                     if not ecommerce_signals:
-                        root_span.set_attribute("exit_reason", "no_ecommerce_sites")
-                        root_span.add_event("process_query.end", {"exit_reason": "no_ecommerce_sites"})
-                        await self._add_status("No e-commerce sites found in results")
+                        root_span.set_attribute("exit_reason", StatusCode.NO_ECOMMERCE_SITES.value)
+                        root_span.add_event(
+                            "process_query.end", {"exit_reason": StatusCode.NO_ECOMMERCE_SITES.value}
+                        )
+                        await self._add_status(
+                            "No e-commerce sites found in results", StatusCode.NO_ECOMMERCE_SITES
+                        )
                         self.state.status = SearchStatus.COMPLETED
                         return self.state
 
@@ -143,7 +151,7 @@ class MainAgent:
                     await self._add_status(f"Scraping {len(sites_to_scrape)} e-commerce sites...")
 
                     async with get_browser() as browser:
-                        with _tracer.start_as_current_span(
+                        with tracer.start_as_current_span(
                             "scrape_sites",
                             attributes={
                                 "site_count": len(sites_to_scrape),
@@ -184,11 +192,11 @@ class MainAgent:
 
             except Exception as exc:
                 logger.error("Pipeline error for query '%s'", query, exc_info=True)
-                root_span.set_status(StatusCode.ERROR, str(exc))
+                root_span.set_status(SpanStatusCode.ERROR, str(exc))
                 root_span.record_exception(exc)
                 root_span.add_event("process_query.end", {"error": str(exc)})
                 self.state.status = SearchStatus.FAILED
-                await self._add_status("Search failed due to an error")
+                await self._add_status("Search failed due to an error", StatusCode.SEARCH_FAILED)
                 return self.state
 
         self.state.status = SearchStatus.COMPLETED
@@ -203,7 +211,9 @@ class MainAgent:
         # TODO: Implement refinement logic
         return self.state
 
-    async def _add_status(self, message: str) -> None:
+    async def _add_status(self, message: str, code: StatusCode | None = None) -> None:
         self.state.status_messages.append(message)
+        if code is not None:
+            self.state.status_codes.add(code)
         if self._status_callback:
             await self._status_callback(self.state.session_id, message)
@@ -13,6 +13,8 @@ from fastapi.staticfiles import StaticFiles
 from src.backend.api.routes import router
 from src.backend.db.engine import init_db
 from src.backend.websocket.handler import websocket_router
+from src.shared.browser import shutdown_browser
+from src.shared.http_client import close_shared_client
 from src.shared.logging import setup_logging, shutdown_tracing
 
 
@@ -21,6 +23,8 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     setup_logging()
     await init_db()
     yield
+    await close_shared_client()
+    await shutdown_browser()
     shutdown_tracing()
 
 
@@ -9,7 +9,7 @@ from sqlalchemy import select
 
 from src.backend.db.engine import async_session
 from src.backend.db.models import ScrapingInstruction
-from src.mcp_servers.web_scraper_mcp.strategy import ScrapingStrategy
+from src.mcp_servers.web_scraper_mcp.strategy import ScrapingStrategy, forget_strategy
 from src.shared.logging import get_logger
 
 logger = get_logger(__name__)
@@ -76,7 +76,13 @@ async def save_strategy(domain: str, strategy: ScrapingStrategy) -> None:
 
 
 async def update_success_rate(domain: str, success: bool) -> None:
-    """Update success rate using exponential moving average (alpha=0.3)."""
+    """Update success rate using exponential moving average (alpha=0.3).
+
+    A failure also evicts the domain's in-process strategy, so a demoted
+    strategy is not served from memory.
+    """
+    if not success:
+        forget_strategy(domain)
     async with async_session() as session:
         stmt = select(ScrapingInstruction).where(ScrapingInstruction.domain == domain)
         result = await session.execute(stmt)
@@ -2,18 +2,28 @@
 
 from __future__ import annotations
 
+import asyncio
 import hashlib
 import re
+import sys
+import time
+from collections import OrderedDict
 from urllib.parse import urljoin, urlparse
 
-from playwright.async_api import Browser
+from playwright.async_api import Browser, ElementHandle, Page, Response
 
 from src.mcp_servers.web_scraper_mcp.db_cache import (
     get_cached_strategy,
     save_strategy,
     update_success_rate,
 )
-from src.mcp_servers.web_scraper_mcp.strategy import ScrapingStrategy, discover_strategy
+from src.mcp_servers.web_scraper_mcp.strategy import (
+    ScrapingStrategy,
+    cached_strategy,
+    discover_strategy,
+    forget_strategy,
+    remember_strategy,
+)
 from src.shared.browser import get_page
 from src.shared.logging import get_logger
 from src.shared.models import ProductResult, Seller
@@ -21,46 +31,114 @@ from src.shared.models import ProductResult, Seller
 logger = get_logger(__name__)
 
 _MAX_PRODUCTS_PER_SITE = 50
+_PRICE_NUMBER_RE = re.compile(r"[\d.,]*\d[\d.,]*")
+_PRICE_SEP_RE = re.compile(r"[.,]")
+# A space (or no-break space) between a digit and exactly three more groups thousands
+_PRICE_SPACE_GROUP_RE = re.compile(r"(?<=\d)[ \u00a0\u202f](?=\d{3}(?!\d))")
+
+# Reads every strategy field of one product container in a single CDP call
+_EXTRACT_JS = """(el, sels) => {
+    const first = (sel) => {
+        if (!sel) return null;
+        try { return el.querySelector(sel); } catch (e) { return null; }
+    };
+    const text = (sel) => {
+        const node = first(sel);
+        return node ? (node.innerText ?? node.textContent ?? "") : null;
+    };
+    const attr = (sel, ...names) => {
+        const node = first(sel);
+        if (!node) return null;
+        for (const name of names) {
+            const value = node.getAttribute(name);
+            if (value) return value;
+        }
+        return null;
+    };
+    return {
+        name: text(sels.name),
+        price: text(sels.price),
+        url: attr(sels.url, "href"),
+        image: attr(sels.image, "src", "data-src"),
+        brand: text(sels.brand),
+        mpn: text(sels.mpn),
+    };
+}"""
+_PAGE_CACHE_SIZE = 128
+# Validators only cover the HTML shell; prices filled in by JS/XHR can
+# change underneath an unchanged ETag, so entries must also age out
+_PAGE_CACHE_TTL_SECONDS = 300.0
+
+# (url, ETag/Last-Modified, product query) -> (monotonic time stored, products extracted)
+_PAGE_CACHE: OrderedDict[tuple[str, str, str], tuple[float, list[ProductResult]]] = OrderedDict()
+
+
+def clear_page_cache() -> None:
+    """Drop all memoized page extractions."""
+    _PAGE_CACHE.clear()
 
 
 def extract_domain(url: str) -> str:
-    """Extract domain from URL, stripping 'www.' prefix."""
-    parsed = urlparse(url)
-    domain = parsed.hostname or ""
+    """Extract domain from URL, stripping 'www.' prefix.
+
+    Interned, since the same few shop domains key every strategy lookup.
+    Slices the host out with str.find instead of urlparse (same result as
+    ``urlparse(url).hostname``, without building the full 6-tuple). IPv6
+    literals are rare enough to go through urlparse itself, which also
+    validates their brackets.
+    """
+    start = url.find("//")
+    if start < 0 or (start and url[start - 1] != ":"):
+        return ""
+    start += 2
+    end = len(url)
+    for sep in "/?#":
+        i = url.find(sep, start, end)
+        if i >= 0:
+            end = i
+    # Drop userinfo, then the port
+    host = url[start:end].rpartition("@")[2]
+    if "[" in host or "]" in host:
+        domain = urlparse(url).hostname or ""
+    else:
+        domain = host.partition(":")[0].lower()
     if domain.startswith("www."):
         domain = domain[4:]
-    return domain
+    return sys.intern(domain)
 
 
 def parse_price(text: str) -> float | None:
-    """Extract numeric price from text containing currency symbols."""
+    """Extract numeric price from text containing currency symbols.
+
+    The last '.' or ',' groups thousands only when exactly three digits
+    follow it and it matches every earlier separator (1,299, 1.299,
+    1,299,000); otherwise it is the decimal point (299.99, 1.299,99,
+    1,234.567). Every grouping separator must be followed by exactly three
+    digits. Text holding more than one number (ranges, was/now pairs) or a
+    dangling separator is rejected rather than guessed at.
+    """
     if not text:
         return None
-    # Remove currency symbols and whitespace
-    cleaned = re.sub(r"[^\d.,]", "", text.strip())
-    if not cleaned:
+    numbers = _PRICE_NUMBER_RE.findall(_PRICE_SPACE_GROUP_RE.sub("", text))
+    if len(numbers) != 1:
         return None
-    # Handle comma as thousands separator (1,299.99) or decimal (1.299,99)
-    if "," in cleaned and "." in cleaned:
-        if cleaned.rindex(",") > cleaned.rindex("."):
-            # European format: 1.299,99
-            cleaned = cleaned.replace(".", "").replace(",", ".")
-        else:
-            # US format: 1,299.99
-            cleaned = cleaned.replace(",", "")
-    elif "," in cleaned:
-        # Could be thousands (1,299) or decimal (12,99)
-        parts = cleaned.split(",")
-        if len(parts[-1]) == 2:
-            # Likely decimal: 12,99
-            cleaned = cleaned.replace(",", ".")
-        else:
-            # Likely thousands: 1,299
-            cleaned = cleaned.replace(",", "")
-    try:
-        return float(cleaned)
-    except ValueError:
+    number = numbers[0]
+    if number[0] in ".," or number[-1] in ".,":
         return None
+    groups = _PRICE_SEP_RE.split(number)
+    if len(groups) == 1:
+        return float(number)
+
+    separators = [c for c in number if c in ".,"]
+    last = separators[-1]
+    if len(groups[-1]) == 3 and all(sep == last for sep in separators):
+        grouping, whole, fraction = separators, groups, ""
+    else:
+        grouping, whole, fraction = separators[:-1], groups[:-1], groups[-1]
+    if len(set(grouping)) > 1 or any(len(group) != 3 for group in whole[1:]):
+        return None
+    digits = "".join(whole)
+    return float(f"{digits}.{fraction}" if fraction else digits)
 
 
 async def scrape_page(
@@ -71,17 +149,18 @@ async def scrape_page(
     """Scrape a product listing page using cached or newly discovered strategy.
 
     1. Navigate to page
-    2. Check for cached strategy
-    3. If cached: use it; on failure re-discover
-    4. If not cached: discover strategy
-    5. Extract products
+    2. Reuse earlier results if the same document was already extracted
+    3. Check for cached strategy
+    4. If cached: use it; on failure re-discover
+    5. If not cached: discover strategy
+    6. Extract products
     """
     domain = extract_domain(url)
     locale = "en-US"
 
     async with get_page(browser, locale=locale) as page:
         try:
-            await page.goto(url, wait_until="domcontentloaded", timeout=20000)
+            response = await page.goto(url, wait_until="domcontentloaded", timeout=20000)
         except Exception:
             logger.warning("Failed to navigate to %s", url)
             return []
@@ -92,37 +171,121 @@ async def scrape_page(
         except Exception:
             pass  # Continue even if not fully idle
 
-        # Try cached strategy first
-        cached = await get_cached_strategy(domain)
-        if cached:
-            logger.info("Using cached strategy for %s", domain)
-            products = await _extract_with_strategy(page, cached, url)
-            if products:
-                await update_success_rate(domain, success=True)
-                return products
-            else:
-                logger.info("Cached strategy failed for %s, re-discovering", domain)
-                await update_success_rate(domain, success=False)
-
-        # Discover new strategy
-        strategy = await discover_strategy(page, product_query)
-        if not strategy:
-            logger.warning("No strategy discovered for %s", domain)
-            return []
+        # Skip extraction when the server vouches this document was seen recently
+        validator = _page_validator(response)
+        cache_key = (url, validator, product_query) if validator else None
+        if cache_key is not None and (entry := _PAGE_CACHE.get(cache_key)) is not None:
+            stored_at, cached_products = entry
+            if time.monotonic() - stored_at <= _PAGE_CACHE_TTL_SECONDS:
+                _PAGE_CACHE.move_to_end(cache_key)
+                logger.info("Page unchanged for %s, reusing extracted products", url)
+                return list(cached_products)
+            del _PAGE_CACHE[cache_key]
 
-        # Save strategy
-        await save_strategy(domain, strategy)
+        products = await _scrape_loaded_page(page, url, domain, product_query)
 
-        # Extract products
-        products = await _extract_with_strategy(page, strategy, url)
-        if not products:
-            logger.warning("Strategy discovered but no products extracted from %s", url)
+        if cache_key is not None and products:
+            _PAGE_CACHE[cache_key] = (time.monotonic(), list(products))
+            if len(_PAGE_CACHE) > _PAGE_CACHE_SIZE:
+                _PAGE_CACHE.popitem(last=False)
 
         return products
 
 
+async def scrape_pages(
+    browser: Browser,
+    urls: list[str],
+    product_query: str = "",
+    *,
+    concurrency: int = 8,
+) -> list[list[ProductResult] | Exception]:
+    """Scrape several pages concurrently over one browser.
+
+    Navigation is dominated by network and render waits, so up to
+    ``concurrency`` pages are loaded at once, each in its own context.
+    Results are returned in the order of ``urls``; a page that raises yields
+    its exception in its slot rather than failing the whole batch.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _one(url: str) -> list[ProductResult]:
+        async with semaphore:
+            return await scrape_page(browser, url, product_query)
+
+    outcomes = await asyncio.gather(*(_one(url) for url in urls), return_exceptions=True)
+
+    results: list[list[ProductResult] | Exception] = []
+    for url, outcome in zip(urls, outcomes, strict=True):
+        if isinstance(outcome, Exception):
+            logger.warning("Scraping %s failed: %s", url, outcome)
+        elif isinstance(outcome, BaseException):
+            raise outcome
+        results.append(outcome)
+    return results
+
+
+def _page_validator(response: Response | None) -> str | None:
+    """Return the navigation response's ETag or Last-Modified, if it sent one.
+
+    Pages without a validator are not cached: hashing the rendered DOM would
+    serialize it on every visit and rarely match on dynamic pages.
+    """
+    if response is None:
+        return None
+    headers = response.headers
+    return headers.get("etag") or headers.get("last-modified")
+
+
+async def _scrape_loaded_page(
+    page: Page,
+    url: str,
+    domain: str,
+    product_query: str,
+) -> list[ProductResult]:
+    """Run the cached-or-discovered strategy against an already loaded page."""
+    # Try cached strategy first
+    cached = await get_cached_strategy(domain)
+    if cached:
+        logger.info("Using cached strategy for %s", domain)
+        products = await _extract_with_strategy(page, cached, url)
+        if products:
+            await update_success_rate(domain, success=True)
+            return products
+        else:
+            logger.info("Cached strategy failed for %s, re-discovering", domain)
+            # Also evicts the in-process copy of the strategy
+            await update_success_rate(domain, success=False)
+
+    # A strategy that worked earlier in this process is only trusted (and
+    # written back to the DB) once it extracts from the live page
+    strategy = cached_strategy(domain)
+    if strategy is not None:
+        products = await _extract_with_strategy(page, strategy, url)
+        if products:
+            await save_strategy(domain, strategy)
+            return products
+        logger.info("Remembered strategy failed for %s, re-discovering", domain)
+        forget_strategy(domain)
+
+    # Discover new strategy
+    strategy = await discover_strategy(page, product_query)
+    if not strategy:
+        logger.warning("No strategy discovered for %s", domain)
+        return []
+
+    # Extract products, and save the strategy only if it worked
+    products = await _extract_with_strategy(page, strategy, url)
+    if not products:
+        logger.warning("Strategy discovered but no products extracted from %s", url)
+        return []
+
+    remember_strategy(domain, strategy)
+    await save_strategy(domain, strategy)
+    return products
+
+
 async def _extract_with_strategy(
-    page: object,
+    page: Page,
     strategy: ScrapingStrategy,
     base_url: str,
 ) -> list[ProductResult]:
@@ -130,99 +293,98 @@ async def _extract_with_strategy(
     domain = extract_domain(base_url)
 
     try:
-        containers = await page.query_selector_all(strategy.product_container)
+        containers = await _query_first_n(page, strategy.product_container, _MAX_PRODUCTS_PER_SITE)
     except Exception:
         logger.warning("Failed to find containers with '%s'", strategy.product_container)
         return []
 
-    products: list[ProductResult] = []
-    for container in containers[:_MAX_PRODUCTS_PER_SITE]:
-        product = await _extract_single_product(container, strategy, base_url, domain)
-        if product:
-            products.append(product)
+    selectors = {
+        "name": strategy.name_selector,
+        "price": strategy.price_selector,
+        "url": strategy.url_selector,
+        "image": strategy.image_selector,
+        "brand": strategy.brand_selector,
+        "mpn": strategy.mpn_selector,
+    }
+    # Playwright multiplexes these over one connection, so N containers cost
+    # about one round trip instead of N
+    extracted = await asyncio.gather(
+        *(_extract_single_product(c, strategy, base_url, domain, selectors) for c in containers)
+    )
+    products = [product for product in extracted if product]
 
     logger.info("Extracted %d products from %s", len(products), domain)
     return products
 
 
+async def _query_first_n(page: Page, selector: str, limit: int) -> list[ElementHandle]:
+    """Return handles for at most ``limit`` elements matching ``selector``.
+
+    The slice happens in the page, so listing pages with hundreds of matches
+    only ship ``limit`` element handles back over CDP.
+    """
+    array = await page.evaluate_handle(
+        "([sel, n]) => Array.from(document.querySelectorAll(sel)).slice(0, n)",
+        [selector, limit],
+    )
+    try:
+        properties = await array.get_properties()
+        elements: list[ElementHandle] = []
+        for _, handle in sorted((int(k), h) for k, h in properties.items() if k.isdigit()):
+            element = handle.as_element()
+            if element is not None:
+                elements.append(element)
+        return elements
+    finally:
+        await array.dispose()
+
+
 async def _extract_single_product(
-    container: object,
+    container: ElementHandle,
     strategy: ScrapingStrategy,
     base_url: str,
     domain: str,
+    selectors: dict[str, str],
 ) -> ProductResult | None:
-    """Extract a single product from a container element."""
-    # Extract name (required)
-    name = ""
-    if strategy.name_selector:
-        try:
-            name_el = await container.query_selector(strategy.name_selector)
-            if name_el:
-                name = (await name_el.inner_text()).strip()
-        except Exception:
-            pass
+    """Extract a single product from a container element.
+
+    All fields come back from one ``container.evaluate`` round trip; a
+    selector that is empty, invalid or unmatched yields None for its field.
+    """
+    try:
+        fields = await container.evaluate(_EXTRACT_JS, selectors)
+    except Exception:
+        return None
 
+    # Extract name (required)
+    name = (fields.get("name") or "").strip()
     if not name:
         return None
 
     # Extract price
     price: float | None = None
     currency = strategy.currency_hint or "USD"
-    if strategy.price_selector:
-        try:
-            price_el = await container.query_selector(strategy.price_selector)
-            if price_el:
-                price_text = (await price_el.inner_text()).strip()
-                price = parse_price(price_text)
-                detected_currency = _detect_currency_from_text(price_text)
-                if detected_currency:
-                    currency = detected_currency
-        except Exception:
-            pass
-
-    # Extract product URL
-    product_url: str | None = None
-    if strategy.url_selector:
-        try:
-            url_el = await container.query_selector(strategy.url_selector)
-            if url_el:
-                href = await url_el.get_attribute("href")
-                if href:
-                    product_url = urljoin(base_url, href)
-        except Exception:
-            pass
-
-    # Extract image URL
-    image_url: str | None = None
-    if strategy.image_selector:
-        try:
-            img_el = await container.query_selector(strategy.image_selector)
-            if img_el:
-                src = await img_el.get_attribute("src") or await img_el.get_attribute("data-src")
-                if src:
-                    image_url = urljoin(base_url, src)
-        except Exception:
-            pass
-
-    # Extract brand
-    brand: str | None = None
-    if strategy.brand_selector:
-        try:
-            brand_el = await container.query_selector(strategy.brand_selector)
-            if brand_el:
-                brand = (await brand_el.inner_text()).strip()
-        except Exception:
-            pass
-
-    # Extract MPN / model_id
-    model_id: str | None = None
-    if strategy.mpn_selector:
-        try:
-            mpn_el = await container.query_selector(strategy.mpn_selector)
-            if mpn_el:
-                model_id = (await mpn_el.inner_text()).strip()
-        except Exception:
-            pass
+    price_text = fields.get("price")
+    if price_text is not None:
+        price_text = price_text.strip()
+        price = parse_price(price_text)
+        detected_currency = _detect_currency_from_text(price_text)
+        if detected_currency:
+            currency = detected_currency
+
+    # Extract product URL and image URL
+    href = fields.get("url")
+    product_url = urljoin(base_url, href) if href else None
+    src = fields.get("image")
+    image_url = urljoin(base_url, src) if src else None
+
+    # Extract brand and MPN / model_id
+    brand = fields.get("brand")
+    if brand is not None:
+        brand = brand.strip()
+    model_id = fields.get("mpn")
+    if model_id is not None:
+        model_id = model_id.strip()
 
     # Fallback model_id from hash
     if not model_id:
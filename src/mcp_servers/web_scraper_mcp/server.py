@@ -3,18 +3,45 @@
 from __future__ import annotations
 
 import json
+from typing import TypedDict
 
 from mcp.server import Server
 from mcp.types import TextContent, Tool
+from pydantic import TypeAdapter
 
 from src.mcp_servers.web_scraper_mcp.db_cache import get_cached_strategy, save_strategy
-from src.mcp_servers.web_scraper_mcp.scraper import scrape_page
+from src.mcp_servers.web_scraper_mcp.scraper import scrape_page, scrape_pages
 from src.mcp_servers.web_scraper_mcp.strategy import ScrapingStrategy
 from src.shared.browser import get_browser
+from src.shared.models import ProductResult
 
 server = Server("web-scraper")
 
 
+class _ScrapePageResponse(TypedDict):
+    products: list[ProductResult]
+    status: str
+
+
+class _PageResult(TypedDict):
+    url: str
+    products: list[ProductResult]
+    # Set when scraping this URL raised; the other URLs are unaffected
+    error: str | None
+
+
+class _ScrapePagesResponse(TypedDict):
+    # One entry per requested URL, in request order (duplicates included)
+    results: list[_PageResult]
+    status: str
+
+
+# Serializes the whole response straight to JSON in pydantic-core, skipping
+# the intermediate model_dump() dicts.
+_SCRAPE_PAGE_RESPONSE = TypeAdapter(_ScrapePageResponse)
+_SCRAPE_PAGES_RESPONSE = TypeAdapter(_ScrapePagesResponse)
+
+
 @server.list_tools()
 async def list_tools() -> list[Tool]:
     return [
@@ -33,6 +60,25 @@ async def list_tools() -> list[Tool]:
                 "required": ["url"],
             },
         ),
+        Tool(
+            name="scrape_pages",
+            description="Scrape several product pages concurrently",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "urls": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "URLs to scrape",
+                    },
+                    "product_query": {
+                        "type": "string",
+                        "description": "What product to look for on the pages",
+                    },
+                },
+                "required": ["urls"],
+            },
+        ),
         Tool(
             name="get_scraping_instructions",
             description="Retrieve cached scraping instructions for a domain",
@@ -69,14 +115,28 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
         product_query = arguments.get("product_query", "")
         async with get_browser() as browser:
             products = await scrape_page(browser, url, product_query)
-        products_data = [p.model_dump() for p in products]
-        return [TextContent(type="text", text=json.dumps({"products": products_data, "status": "ok"}))]
+        response = _SCRAPE_PAGE_RESPONSE.dump_json({"products": products, "status": "ok"})
+        return [TextContent(type="text", text=response.decode())]
+
+    elif name == "scrape_pages":
+        urls = arguments["urls"]
+        product_query = arguments.get("product_query", "")
+        async with get_browser() as browser:
+            results = await scrape_pages(browser, urls, product_query)
+        pages: list[_PageResult] = [
+            _PageResult(url=u, products=[], error=f"{type(r).__name__}: {r}")
+            if isinstance(r, Exception)
+            else _PageResult(url=u, products=r, error=None)
+            for u, r in zip(urls, results, strict=True)
+        ]
+        response = _SCRAPE_PAGES_RESPONSE.dump_json({"results": pages, "status": "ok"})
+        return [TextContent(type="text", text=response.decode())]
 
     elif name == "get_scraping_instructions":
         domain = arguments["domain"]
         strategy = await get_cached_strategy(domain)
         if strategy:
-            return [TextContent(type="text", text=json.dumps({"strategy": json.loads(strategy.to_json()), "status": "found"}))]
+            return [TextContent(type="text", text=json.dumps({"strategy": strategy.to_dict(), "status": "found"}))]
         return [TextContent(type="text", text=json.dumps({"strategy": None, "status": "not_found"}))]
 
     elif name == "save_scraping_instructions":
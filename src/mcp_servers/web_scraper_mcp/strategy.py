@@ -3,7 +3,12 @@
 from __future__ import annotations
 
 import json
-from dataclasses import asdict, dataclass
+import re
+import sys
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, fields
+from typing import Any
 
 from playwright.async_api import Page
 
@@ -12,7 +17,7 @@ from src.shared.logging import get_logger
 logger = get_logger(__name__)
 
 # CSS selector candidates tried in order for product containers
-_CONTAINER_CANDIDATES: list[str] = [
+_CONTAINER_CANDIDATES: tuple[str, ...] = (
     "[data-product-id]",
     "[data-item-id]",
     ".product-card",
@@ -25,35 +30,35 @@ _CONTAINER_CANDIDATES: list[str] = [
     "li[class*='product']",
     "div[class*='product']",
     "article[class*='product']",
-]
+)
 
-_NAME_CANDIDATES: list[str] = [
+_NAME_CANDIDATES: tuple[str, ...] = (
     "h2 a", "h3 a", "h2", "h3",
     "[class*='title'] a", "[class*='name'] a",
     "[class*='title']", "[class*='name']",
     "a[class*='product']",
-]
+)
 
-_PRICE_CANDIDATES: list[str] = [
+_PRICE_CANDIDATES: tuple[str, ...] = (
     "[class*='price']",
     "[data-price]",
     "span[class*='amount']",
     "[class*='cost']",
-]
+)
 
-_IMAGE_CANDIDATES: list[str] = [
+_IMAGE_CANDIDATES: tuple[str, ...] = (
     "img[src*='product']", "img[data-src]",
     "img[class*='product']", "img",
-]
+)
 
-_URL_CANDIDATES: list[str] = [
+_URL_CANDIDATES: tuple[str, ...] = (
     "a[href*='/product']", "a[href*='/dp/']",
     "a[href*='/item']", "a[href*='/p/']",
     "a[href]",
-]
+)
 
 
-@dataclass
+@dataclass(slots=True)
 class ScrapingStrategy:
     product_container: str
     name_selector: str = ""
@@ -67,8 +72,20 @@ class ScrapingStrategy:
     version: int = 1
     discovery_method: str = "css_candidates"
 
+    def __post_init__(self) -> None:
+        # Strategies for different domains mostly share the same candidate
+        # selectors; intern them so equal selectors share one string object
+        for name in _STRATEGY_FIELDS:
+            value = getattr(self, name)
+            if isinstance(value, str):
+                setattr(self, name, sys.intern(value))
+
+    def to_dict(self) -> dict[str, Any]:
+        # All fields are flat scalars, so asdict()'s recursive deepcopy is not needed
+        return {name: getattr(self, name) for name in _STRATEGY_FIELDS}
+
     def to_json(self) -> str:
-        return json.dumps(asdict(self))
+        return json.dumps(self.to_dict())
 
     @classmethod
     def from_json(cls, data: str) -> ScrapingStrategy:
@@ -77,186 +94,220 @@ class ScrapingStrategy:
         return cls(**valid_fields)
 
 
+_STRATEGY_FIELDS: tuple[str, ...] = tuple(f.name for f in fields(ScrapingStrategy))
+
+_DIGIT_RE = re.compile(r"\d")
+_CURRENCY_SYMBOLS = frozenset("$₪€£¥")
+
+# (currency, symbol, codes) in detection priority order
+_CURRENCY_MARKERS: tuple[tuple[str, str, tuple[str, ...]], ...] = (
+    ("ILS", "₪", ("NIS", "ILS")),
+    ("EUR", "€", ("EUR",)),
+    ("GBP", "£", ("GBP",)),
+    ("USD", "$", ("USD",)),
+)
+
+
 def _looks_like_price(text: str) -> bool:
     """Check if text looks like a price string."""
     if not text:
         return False
     # Must contain at least one digit
-    if not any(c.isdigit() for c in text):
+    if not _DIGIT_RE.search(text):
         return False
     # Should contain currency symbol or have numeric format
-    currency_symbols = {"$", "₪", "€", "£", "¥"}
-    has_currency = any(s in text for s in currency_symbols)
+    has_currency = not _CURRENCY_SYMBOLS.isdisjoint(text)
     has_decimal = "." in text or "," in text
     return has_currency or has_decimal or text.strip().replace(",", "").replace(".", "").isdigit()
 
 
 def _detect_currency(text: str) -> str:
     """Detect currency from text containing price."""
-    if "₪" in text or "NIS" in text.upper() or "ILS" in text.upper():
+    # Highest-priority symbol needs no case fold
+    if "₪" in text:
         return "ILS"
-    if "€" in text or "EUR" in text.upper():
-        return "EUR"
-    if "£" in text or "GBP" in text.upper():
-        return "GBP"
-    if "$" in text or "USD" in text.upper():
-        return "USD"
+    upper = text.upper()
+    for currency, symbol, codes in _CURRENCY_MARKERS:
+        if symbol in text or any(code in upper for code in codes):
+            return currency
     return ""
 
 
-async def _find_selector(container, candidates: list[str]) -> str:
-    """Try selector candidates against a container, return first that matches."""
-    for selector in candidates:
-        try:
-            el = await container.query_selector(selector)
-            if el:
-                return selector
-        except Exception:
-            continue
-    return ""
-
+_STRATEGY_CACHE_SIZE = 256
+# Well under the DB cache's 30 days: a layout change should be re-probed soon
+_STRATEGY_CACHE_TTL_SECONDS = 3600.0
 
-async def discover_strategy(page: Page, product_query: str = "") -> ScrapingStrategy | None:
-    """Discover scraping strategy by trying CSS selector candidates.
-
-    Requires at least 2 matching containers to consider a strategy valid.
-    Falls back to price-pattern discovery if CSS candidates fail.
-    """
-    # Try each container candidate
-    for container_selector in _CONTAINER_CANDIDATES:
-        try:
-            containers = await page.query_selector_all(container_selector)
-        except Exception:
-            continue
-
-        if len(containers) < 2:
-            continue
-
-        logger.info(
-            "Found %d containers with selector '%s'",
-            len(containers), container_selector,
-        )
-
-        # Use first container to discover sub-selectors
-        first = containers[0]
-        name_sel = await _find_selector(first, _NAME_CANDIDATES)
-        price_sel = await _find_selector(first, _PRICE_CANDIDATES)
-        image_sel = await _find_selector(first, _IMAGE_CANDIDATES)
-        url_sel = await _find_selector(first, _URL_CANDIDATES)
-
-        # Must find at least name selector
-        if not name_sel:
-            continue
-
-        # Detect currency from price if available
-        currency_hint = ""
-        if price_sel:
-            try:
-                price_el = await first.query_selector(price_sel)
-                if price_el:
-                    price_text = await price_el.inner_text()
-                    currency_hint = _detect_currency(price_text)
-            except Exception:
-                pass
-
-        return ScrapingStrategy(
-            product_container=container_selector,
-            name_selector=name_sel,
-            price_selector=price_sel,
-            image_selector=image_sel,
-            url_selector=url_sel,
-            currency_hint=currency_hint,
-            discovery_method="css_candidates",
-        )
+# domain (as keyed in the DB) -> (monotonic time stored, strategy that last worked there)
+_STRATEGY_CACHE: OrderedDict[str, tuple[float, ScrapingStrategy]] = OrderedDict()
 
-    # Fallback: price-pattern based discovery
-    strategy = await _discover_by_price_pattern(page)
-    if strategy:
-        return strategy
 
-    logger.warning("Could not discover scraping strategy for page")
-    return None
+def clear_strategy_cache() -> None:
+    """Drop all in-process discovered strategies."""
+    _STRATEGY_CACHE.clear()
 
 
-async def _discover_by_price_pattern(page: Page) -> ScrapingStrategy | None:
-    """JS fallback: find repeating elements containing currency symbols."""
-    try:
-        result = await page.evaluate("""() => {
-            const currencyPattern = /[$₪€£¥]\\s*[\\d,.]+|[\\d,.]+\\s*[$₪€£¥]/;
-            const priceElements = [];
-
-            const walker = document.createTreeWalker(
-                document.body, NodeFilter.SHOW_TEXT, null
-            );
-
-            while (walker.nextNode()) {
-                const text = walker.currentNode.textContent.trim();
-                if (currencyPattern.test(text)) {
-                    const parent = walker.currentNode.parentElement;
-                    if (parent) {
-                        priceElements.push({
-                            tag: parent.tagName.toLowerCase(),
-                            className: parent.className || '',
-                            parentTag: parent.parentElement?.tagName.toLowerCase() || '',
-                            parentClass: parent.parentElement?.className || ''
-                        });
-                    }
-                }
-            }
-
-            // Group by parent tag+class to find repeating pattern
-            const groups = {};
-            for (const el of priceElements) {
-                const key = `${el.parentTag}.${el.parentClass}`;
-                groups[key] = (groups[key] || 0) + 1;
-            }
-
-            // Find the most common repeating group (min 2)
-            let bestKey = null;
-            let bestCount = 0;
-            for (const [key, count] of Object.entries(groups)) {
-                if (count >= 2 && count > bestCount) {
-                    bestKey = key;
-                    bestCount = count;
-                }
+def cached_strategy(domain: str) -> ScrapingStrategy | None:
+    """Return the unexpired strategy remembered for domain, if any."""
+    entry = _STRATEGY_CACHE.get(domain)
+    if entry is None:
+        return None
+    stored_at, strategy = entry
+    if time.monotonic() - stored_at > _STRATEGY_CACHE_TTL_SECONDS:
+        del _STRATEGY_CACHE[domain]
+        return None
+    _STRATEGY_CACHE.move_to_end(domain)
+    return strategy
+
+
+def remember_strategy(domain: str, strategy: ScrapingStrategy) -> None:
+    """Remember a strategy that extracted products from domain."""
+    _STRATEGY_CACHE[domain] = (time.monotonic(), strategy)
+    _STRATEGY_CACHE.move_to_end(domain)
+    if len(_STRATEGY_CACHE) > _STRATEGY_CACHE_SIZE:
+        _STRATEGY_CACHE.popitem(last=False)
+
+
+def forget_strategy(domain: str) -> None:
+    """Drop the remembered strategy for domain, e.g. after it stopped working."""
+    _STRATEGY_CACHE.pop(domain, None)
+
+
+# The whole discovery state machine, run in the page in one round trip:
+# 1. the first container candidate with >= 2 matches whose first match has a
+#    name selector, probed for every sub-selector category;
+# 2. otherwise the most common parent of currency-looking text nodes.
+# Returns null when neither finds a repeating product element.
+_DISCOVER_JS = """({containers, probes}) => {
+    const probe = (el, categories) => {
+        const found = {};
+        for (const [key, selectors] of Object.entries(categories)) {
+            found[key] = '';
+            for (const sel of selectors) {
+                try {
+                    if (el.querySelector(sel)) { found[key] = sel; break; }
+                } catch (e) { /* invalid selector, try the next one */ }
             }
+        }
+        return found;
+    };
+
+    for (const sel of containers) {
+        let matches;
+        try { matches = document.querySelectorAll(sel); } catch (e) { continue; }
+        if (matches.length < 2) continue;
+
+        const found = probe(matches[0], probes);
+        if (!found.name) continue;
+
+        const priceEl = found.price ? matches[0].querySelector(found.price) : null;
+        return {
+            method: 'css_candidates',
+            container: sel,
+            count: matches.length,
+            ...found,
+            priceText: priceEl ? priceEl.innerText : ''
+        };
+    }
+
+    // Fallback: find repeating elements containing currency symbols
+    const currencyPattern = /[$₪€£¥]\\s*[\\d,.]+|[\\d,.]+\\s*[$₪€£¥]/;
+    const groups = {};
+
+    const walker = document.createTreeWalker(
+        document.body, NodeFilter.SHOW_TEXT, null
+    );
+
+    while (walker.nextNode()) {
+        const text = walker.currentNode.textContent.trim();
+        if (!currencyPattern.test(text)) continue;
+        const parent = walker.currentNode.parentElement;
+        if (!parent) continue;
+        // Group by parent tag+class to find repeating pattern
+        const parentTag = parent.parentElement?.tagName.toLowerCase() || '';
+        const parentClass = parent.parentElement?.className || '';
+        const key = `${parentTag}.${parentClass}`;
+        groups[key] = (groups[key] || 0) + 1;
+    }
+
+    // Find the most common repeating group (min 2)
+    let bestKey = null;
+    let bestCount = 0;
+    for (const [key, count] of Object.entries(groups)) {
+        if (count >= 2 && count > bestCount) {
+            bestKey = key;
+            bestCount = count;
+        }
+    }
+
+    if (!bestKey) return null;
+
+    const [tag, cls] = bestKey.split('.');
+    const firstClass = (cls || '').split(/\\s+/).filter(Boolean)[0];
+    const container = firstClass ? `${tag}.${firstClass}` : tag;
+
+    // Verify the selector works
+    let matches;
+    try { matches = document.querySelectorAll(container); } catch (e) { return null; }
+    if (matches.length < 2) return null;
+
+    const found = probe(matches[0], {name: probes.name, price: probes.price});
+    return {
+        method: 'price_pattern',
+        container,
+        count: matches.length,
+        name: found.name,
+        price: found.price
+    };
+}"""
 
-            if (!bestKey) return null;
-
-            const [tag, cls] = bestKey.split('.');
-            return { tag, className: cls, count: bestCount };
-        }""")
-
-        if not result:
-            return None
 
-        tag = result.get("tag", "div")
-        class_name = result.get("className", "")
+async def discover_strategy(page: Page, product_query: str = "") -> ScrapingStrategy | None:
+    """Discover scraping strategy by trying CSS selector candidates.
 
-        if class_name:
-            first_class = class_name.split()[0]
-            container_selector = f"{tag}.{first_class}"
-        else:
-            container_selector = tag
+    Requires at least 2 matching containers to consider a strategy valid.
+    Falls back to price-pattern discovery if CSS candidates fail. Both
+    passes run inside the page in a single evaluate call.
+    """
+    try:
+        result = await page.evaluate(_DISCOVER_JS, {
+            "containers": _CONTAINER_CANDIDATES,
+            "probes": {
+                "name": _NAME_CANDIDATES,
+                "price": _PRICE_CANDIDATES,
+                "image": _IMAGE_CANDIDATES,
+                "url": _URL_CANDIDATES,
+            },
+        })
+    except Exception:
+        logger.warning("Strategy discovery script failed")
+        result = None
 
-        # Verify the selector works
-        containers = await page.query_selector_all(container_selector)
-        if len(containers) < 2:
-            return None
+    if not result:
+        logger.warning("Could not discover scraping strategy for page")
+        return None
 
-        first = containers[0]
-        name_sel = await _find_selector(first, _NAME_CANDIDATES)
-        price_sel = await _find_selector(first, _PRICE_CANDIDATES)
-        if not price_sel:
-            price_sel = "span"  # Fallback: the span containing the price
+    container_selector = result["container"]
+    logger.info(
+        "Found %d containers with selector '%s'",
+        result.get("count", 0), container_selector,
+    )
 
+    if result.get("method") == "price_pattern":
         return ScrapingStrategy(
             product_container=container_selector,
-            name_selector=name_sel or "a",
-            price_selector=price_sel,
+            name_selector=result.get("name") or "a",
+            # Fallback: the span containing the price
+            price_selector=result.get("price") or "span",
             discovery_method="price_pattern",
         )
 
-    except Exception:
-        logger.warning("Price pattern discovery failed")
-        return None
+    price_sel = result.get("price", "")
+    return ScrapingStrategy(
+        product_container=container_selector,
+        name_selector=result["name"],
+        price_selector=price_sel,
+        image_selector=result.get("image", ""),
+        url_selector=result.get("url", ""),
+        currency_hint=_detect_currency(result.get("priceText", "")) if price_sel else "",
+        discovery_method="css_candidates",
+    )
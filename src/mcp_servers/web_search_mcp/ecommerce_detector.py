@@ -2,14 +2,18 @@
 
 from __future__ import annotations
 
+import heapq
+import re
 from dataclasses import dataclass, field
+from functools import lru_cache
+from operator import attrgetter
 from urllib.parse import urlparse
 
 from src.shared.logging import get_logger
 
 logger = get_logger(__name__)
 
-_KNOWN_ECOMMERCE_DOMAINS: set[str] = {
+_KNOWN_ECOMMERCE_DOMAINS: frozenset[str] = frozenset({
     # Global
     "amazon.com", "amazon.co.uk", "amazon.de", "amazon.fr",
     "ebay.com", "ebay.co.uk", "ebay.de",
@@ -19,20 +23,18 @@ _KNOWN_ECOMMERCE_DOMAINS: set[str] = {
     "zap.co.il", "ksp.co.il", "bug.co.il", "ivory.co.il",
     "lastprice.co.il", "wisebuy.co.il", "machsanei-hashmal.co.il",
     "next.co.il", "shufersal.co.il",
-}
+})
 
-_NON_ECOMMERCE_DOMAINS: set[str] = {
+_NON_ECOMMERCE_DOMAINS: frozenset[str] = frozenset({
     "youtube.com", "wikipedia.org", "reddit.com", "facebook.com",
     "twitter.com", "x.com", "instagram.com", "linkedin.com",
     "tiktok.com", "pinterest.com", "quora.com", "medium.com",
     "github.com", "stackoverflow.com", "bbc.com", "cnn.com",
-}
+})
 
-_ECOMMERCE_PATH_PATTERNS: list[str] = [
-    "/products/", "/product/", "/shop/", "/store/",
-    "/dp/", "/item/", "/buy/", "/p/", "/catalog/",
-    "/collections/", "/listing/",
-]
+_ECOMMERCE_PATH_RE = re.compile(
+    r"/(products?|shop|store|dp|item|buy|p|catalog|collections|listing)/"
+)
 
 _ECOMMERCE_KEYWORDS_EN: list[str] = [
     "price", "buy", "shop", "add to cart", "in stock",
@@ -49,8 +51,12 @@ _ECOMMERCE_KEYWORDS_AR: list[str] = [
     "شحن", "طلب",
 ]
 
+_ALL_KEYWORDS: tuple[str, ...] = (
+    *_ECOMMERCE_KEYWORDS_EN, *_ECOMMERCE_KEYWORDS_HE, *_ECOMMERCE_KEYWORDS_AR,
+)
+
 
-@dataclass
+@dataclass(slots=True)
 class EcommerceSignal:
     url: str
     domain: str
@@ -61,54 +67,71 @@ class EcommerceSignal:
 
 def extract_domain(url: str) -> str:
     """Extract domain from URL, stripping 'www.' prefix."""
-    parsed = urlparse(url)
-    domain = parsed.hostname or ""
+    return _domain_of(urlparse(url).hostname)
+
+
+def _domain_of(hostname: str | None) -> str:
+    domain = hostname or ""
     if domain.startswith("www."):
         domain = domain[4:]
     return domain
 
 
+def _matching_suffix(domain: str, domains: frozenset[str]) -> str | None:
+    """Return the entry of domains equal to domain or one of its dot-suffixes."""
+    while domain:
+        if domain in domains:
+            return domain
+        _, _, domain = domain.partition(".")
+    return None
+
+
 def detect_ecommerce(url: str, title: str = "", snippet: str = "") -> EcommerceSignal:
     """Score a URL for e-commerce likelihood using multiple signals.
 
     Returns an EcommerceSignal with confidence score and contributing signals.
     Threshold for is_ecommerce: 0.3
     """
-    domain = extract_domain(url)
+    domain, is_ecommerce, confidence, signals = _detect_ecommerce_cached(url, title, snippet)
+    return EcommerceSignal(
+        url=url, domain=domain, is_ecommerce=is_ecommerce,
+        confidence=confidence, signals=list(signals),
+    )
+
+
+@lru_cache(maxsize=4096)
+def _detect_ecommerce_cached(
+    url: str, title: str, snippet: str,
+) -> tuple[str, bool, float, tuple[str, ...]]:
+    """Scoring core for detect_ecommerce; the same results recur across searches."""
+    parsed = urlparse(url)
+    domain = _domain_of(parsed.hostname)
     confidence = 0.0
     signals: list[str] = []
 
     # Fast rejection for known non-ecommerce
-    for non_ec in _NON_ECOMMERCE_DOMAINS:
-        if domain == non_ec or domain.endswith(f".{non_ec}"):
-            return EcommerceSignal(
-                url=url, domain=domain, is_ecommerce=False,
-                confidence=0.0, signals=["known_non_ecommerce"],
-            )
+    if _matching_suffix(domain, _NON_ECOMMERCE_DOMAINS):
+        return domain, False, 0.0, ("known_non_ecommerce",)
 
     # Known e-commerce domain
-    for ec_domain in _KNOWN_ECOMMERCE_DOMAINS:
-        if domain == ec_domain or domain.endswith(f".{ec_domain}"):
-            confidence += 0.8
-            signals.append(f"known_ecommerce:{ec_domain}")
-            break
+    ec_domain = _matching_suffix(domain, _KNOWN_ECOMMERCE_DOMAINS)
+    if ec_domain:
+        confidence += 0.8
+        signals.append(f"known_ecommerce:{ec_domain}")
 
     # URL path patterns
-    path = urlparse(url).path.lower()
-    for pattern in _ECOMMERCE_PATH_PATTERNS:
-        if pattern in path:
-            confidence += 0.3
-            signals.append(f"path_pattern:{pattern.strip('/')}")
-            break
+    path_match = _ECOMMERCE_PATH_RE.search(parsed.path.lower())
+    if path_match:
+        confidence += 0.3
+        signals.append(f"path_pattern:{path_match.group(1)}")
 
     # Keyword analysis in title and snippet
     combined_text = f"{title} {snippet}".lower()
     keyword_score = 0.0
 
-    all_keywords = _ECOMMERCE_KEYWORDS_EN + _ECOMMERCE_KEYWORDS_HE + _ECOMMERCE_KEYWORDS_AR
     matched_keywords: list[str] = []
 
-    for keyword in all_keywords:
+    for keyword in _ALL_KEYWORDS:
         if keyword in combined_text:
             keyword_score += 0.1
             matched_keywords.append(keyword)
@@ -121,19 +144,21 @@ def detect_ecommerce(url: str, title: str = "", snippet: str = "") -> EcommerceS
 
     is_ecommerce = confidence >= 0.3
 
-    return EcommerceSignal(
-        url=url, domain=domain, is_ecommerce=is_ecommerce,
-        confidence=round(confidence, 2), signals=signals,
-    )
+    return domain, is_ecommerce, round(confidence, 2), tuple(signals)
+
+
+_BY_CONFIDENCE = attrgetter("confidence")
 
 
 def identify_ecommerce_sites(
     urls_data: list[dict[str, str]],
+    top_k: int | None = None,
 ) -> list[EcommerceSignal]:
     """Filter and sort URLs by e-commerce confidence.
 
     Args:
         urls_data: List of dicts with 'url', optionally 'title' and 'snippet'.
+        top_k: If given, return only the top_k most confident sites.
 
     Returns:
         E-commerce URLs sorted by confidence descending.
@@ -148,5 +173,7 @@ def identify_ecommerce_sites(
         if signal.is_ecommerce:
             results.append(signal)
 
-    results.sort(key=lambda s: s.confidence, reverse=True)
+    if top_k is not None:
+        return heapq.nlargest(top_k, results, key=_BY_CONFIDENCE)
+    results.sort(key=_BY_CONFIDENCE, reverse=True)
     return results
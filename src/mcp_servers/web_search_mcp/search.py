@@ -4,15 +4,16 @@ from __future__ import annotations
 
 import re
 from dataclasses import dataclass
-from urllib.parse import quote_plus, unquote
+from functools import lru_cache
+from urllib.parse import quote_plus, unquote_plus, urlsplit
 
-import httpx
 from opentelemetry import trace
+from selectolax.lexbor import LexborHTMLParser, LexborNode
 
-from src.shared.logging import get_logger, get_tracer
+from src.shared.http_client import get_shared_client
+from src.shared.logging import get_logger
 
 logger = get_logger(__name__)
-_tracer = get_tracer(__name__)
 
 _SEARCH_URL = "https://html.duckduckgo.com/html/"
 
@@ -30,6 +31,23 @@ _REGION_CODES: dict[str, str] = {
     "us": "us-en",
 }
 
+# (language, market) -> (query suffix, DDG region code) for every known pair
+_QUERY_PARAMS: dict[tuple[str, str], tuple[str, str]] = {
+    (language, market): (suffix, kl)
+    for language, suffix in _BUY_ONLINE_SUFFIXES.items()
+    for market, kl in _REGION_CODES.items()
+}
+
+
+# Characters quote_plus leaves alone, plus the space it turns into '+'
+_URL_SAFE_RE = re.compile(r"[A-Za-z0-9 _.~-]*")
+
+# First non-empty uddg= query parameter of a DDG redirect link
+_UDDG_RE = re.compile(r"[?&]uddg=([^&#]+)")
+
+# Query parameters that only track the click and never change the page
+_TRACKING_PARAMS = frozenset({"gclid", "fbclid", "msclkid", "yclid", "dclid", "mc_cid", "mc_eid"})
+
 _REQUEST_HEADERS = {
     "User-Agent": (
         "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
@@ -38,27 +56,35 @@ _REQUEST_HEADERS = {
     ),
 }
 
-_REQUEST_TIMEOUT = 20.0
-
-
-@dataclass
+@dataclass(frozen=True, slots=True)
 class SearchResult:
     url: str
     title: str
     snippet: str
 
 
+@lru_cache(maxsize=1024)
 def build_search_url(query: str, language: str = "en", market: str = "us") -> str:
     """Build the augmented search query URL.
 
     Augments query with 'buy online' in the appropriate language to bias
     toward shopping results.  Returns the DuckDuckGo HTML endpoint URL.
     """
-    suffix = _BUY_ONLINE_SUFFIXES.get(language, "buy online")
-    augmented_query = f"{query} {suffix}"
-    encoded = quote_plus(augmented_query)
-    kl = _REGION_CODES.get(market, "us-en")
-    return f"{_SEARCH_URL}?q={encoded}&kl={kl}"
+    params = _QUERY_PARAMS.get((language, market))
+    if params is None:
+        params = (
+            _BUY_ONLINE_SUFFIXES.get(language, "buy online"),
+            _REGION_CODES.get(market, "us-en"),
+        )
+    suffix, kl = params
+    return f"{_SEARCH_URL}?q={_quote_query(f'{query} {suffix}')}&kl={kl}"
+
+
+def _quote_query(text: str) -> str:
+    """quote_plus with a fast path for queries that only need spaces encoded."""
+    if _URL_SAFE_RE.fullmatch(text):
+        return text.replace(" ", "+")
+    return quote_plus(text)
 
 
 def _extract_ddg_url(raw_url: str) -> str:
@@ -66,53 +92,83 @@ def _extract_ddg_url(raw_url: str) -> str:
 
     DDG wraps results in ``//duckduckgo.com/l/?uddg=<encoded_url>&…``.
     """
-    if "uddg=" in raw_url:
-        match = re.search(r"uddg=([^&]+)", raw_url)
-        if match:
-            return unquote(match.group(1))
+    match = _UDDG_RE.search(raw_url)
+    if match:
+        return unquote_plus(match.group(1))
     # Direct URL (no redirect wrapper)
     if raw_url.startswith("//"):
         return "https:" + raw_url
     return raw_url
 
 
+def _is_ddg_internal(url: str, raw_url: str) -> bool:
+    """True for links to DuckDuckGo itself rather than a redirected result."""
+    return "duckduckgo.com" in url and "/l/?" not in raw_url
+
+
+def _is_tracking_param(pair: str) -> bool:
+    name = pair.partition("=")[0].lower()
+    return name.startswith("utm_") or name in _TRACKING_PARAMS
+
+
+def _canonical(url: str) -> str:
+    """Dedupe key for a result URL.
+
+    Ignores scheme, host case, fragment, a trailing slash and tracking
+    parameters, so trivial variants of one page collapse together.
+    """
+    parts = urlsplit(url)
+    query = parts.query
+    if query:
+        query = "&".join(pair for pair in query.split("&") if not _is_tracking_param(pair))
+    key = parts.netloc.lower() + parts.path.rstrip("/")
+    return f"{key}?{query}" if query else key
+
+
+def _container_snippet(link: LexborNode) -> str | None:
+    """Snippet from the link's own ``.result`` block; None if it has no block."""
+    node = link.parent
+    while node is not None:
+        if "result" in (node.attributes.get("class") or "").split():
+            snippet = node.css_first(".result__snippet")
+            return snippet.text().strip() if snippet is not None else ""
+        node = node.parent
+    return None
+
+
 def extract_search_results(html: str) -> list[SearchResult]:
     """Extract URLs, titles, and snippets from DuckDuckGo HTML search results."""
     results: list[SearchResult] = []
     seen_urls: set[str] = set()
 
-    # DuckDuckGo uses <a class="result__a" href="...">TITLE</a>
-    link_pattern = re.compile(
-        r'<a[^>]*class="result__a"[^>]*href="([^"]+)"[^>]*>(.*?)</a>',
-        re.DOTALL | re.IGNORECASE,
-    )
-
-    # Snippets are in <a class="result__snippet" ...>TEXT</a>
-    snippet_pattern = re.compile(
-        r'<a[^>]*class="result__snippet"[^>]*>(.*?)</a>',
-        re.DOTALL | re.IGNORECASE,
-    )
-
-    link_matches = link_pattern.findall(html)
-    snippet_matches = snippet_pattern.findall(html)
+    # DuckDuckGo uses <a class="result__a" href="...">TITLE</a> for results
+    # and <a class="result__snippet">TEXT</a> for their snippets, both inside
+    # a <div class="result"> block
+    tree = LexborHTMLParser(html)
+    snippets: list[str] | None = None
 
-    for i, (raw_url, raw_title) in enumerate(link_matches):
+    for i, link in enumerate(tree.css("a.result__a")):
+        raw_url = link.attributes.get("href") or ""
         url = _extract_ddg_url(raw_url)
-        title = re.sub(r"<[^>]+>", "", raw_title).strip()
-        if not title or not url:
+        # Skip DuckDuckGo-internal links before extracting the title text
+        if not url or _is_ddg_internal(url, raw_url):
             continue
 
-        # Skip DuckDuckGo-internal links
-        if "duckduckgo.com" in url and "/l/?" not in raw_url:
+        title = link.text().strip()
+        if not title:
             continue
 
-        if url in seen_urls:
+        key = _canonical(url)
+        if key in seen_urls:
             continue
-        seen_urls.add(url)
+        seen_urls.add(key)
 
-        snippet = ""
-        if i < len(snippet_matches):
-            snippet = re.sub(r"<[^>]+>", "", snippet_matches[i]).strip()
+        snippet = _container_snippet(link)
+        if snippet is None:
+            # Bare markup without result blocks: pair links and snippets by position
+            if snippets is None:
+                snippets = [node.text().strip() for node in tree.css("a.result__snippet")]
+            snippet = snippets[i] if i < len(snippets) else ""
 
         results.append(SearchResult(url=url, title=title, snippet=snippet))
 
@@ -140,13 +196,15 @@ async def search_products(
     span.add_event("search_started", {"query": query, "language": language, "market": market, "url": url})
 
     for attempt in range(1, _max_attempts + 1):
+        html = ""
         try:
-            async with httpx.AsyncClient(
-                timeout=_REQUEST_TIMEOUT,
-                follow_redirects=True,
-                headers=_REQUEST_HEADERS,
-            ) as client:
-                response = await client.get(url)
+            async with get_shared_client().stream("GET", url, headers=_REQUEST_HEADERS) as response:
+                status_code = response.status_code
+                http_version = response.http_version
+                # Error pages are dropped unread; only a 200 body is decoded
+                if status_code == 200:
+                    await response.aread()
+                    html = response.text
         except Exception:
             logger.warning(
                 "HTTP request failed for '%s' (attempt %d/%d)",
@@ -158,20 +216,20 @@ async def search_products(
                 return []
             continue
 
-        span.set_attribute("http_status", response.status_code)
+        span.set_attribute("http_status", status_code)
+        logger.debug("Search response for '%s' over %s", query, http_version)
 
-        if response.status_code != 200:
+        if status_code != 200:
             logger.warning(
                 "Search returned HTTP %d for '%s' (attempt %d/%d)",
-                response.status_code, query, attempt, _max_attempts,
+                status_code, query, attempt, _max_attempts,
             )
             if attempt == _max_attempts:
-                span.set_attribute("exit_reason", f"http_{response.status_code}")
-                span.add_event("search_completed", {"exit_reason": f"http_{response.status_code}"})
+                span.set_attribute("exit_reason", f"http_{status_code}")
+                span.add_event("search_completed", {"exit_reason": f"http_{status_code}"})
                 return []
             continue
 
-        html = response.text
         results = extract_search_results(html)
         if not results:
             span.set_attribute("exit_reason", "no_results_extracted")
@@ -2,8 +2,7 @@
 
 from __future__ import annotations
 
-import json
-
+import orjson
 from mcp.server import Server
 from mcp.types import TextContent, Tool
 
@@ -54,11 +53,9 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
         language = arguments.get("language", "en")
         market = arguments.get("market", "us")
         results = await search_products(query, language, market)
-        urls_data = [
-            {"url": r.url, "title": r.title, "snippet": r.snippet}
-            for r in results
-        ]
-        return [TextContent(type="text", text=json.dumps({"urls": urls_data, "status": "ok"}))]
+        # orjson serializes the slotted SearchResult dataclasses natively
+        payload = orjson.dumps({"urls": results, "status": "ok"})
+        return [TextContent(type="text", text=payload.decode())]
 
     elif name == "identify_ecommerce_sites":
         urls_data = arguments["urls"]
@@ -67,6 +64,7 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
             {"url": s.url, "domain": s.domain, "confidence": s.confidence, "signals": s.signals}
             for s in signals
         ]
-        return [TextContent(type="text", text=json.dumps({"ecommerce_urls": ecommerce_urls, "status": "ok"}))]
+        payload = orjson.dumps({"ecommerce_urls": ecommerce_urls, "status": "ok"})
+        return [TextContent(type="text", text=payload.decode())]
 
     raise ValueError(f"Unknown tool: {name}")
@@ -2,10 +2,11 @@
 
 from __future__ import annotations
 
+import asyncio
 from collections.abc import AsyncIterator
 from contextlib import asynccontextmanager
 
-from playwright.async_api import Browser, Page, async_playwright
+from playwright.async_api import Browser, Page, Playwright, async_playwright
 
 from src.shared.config import settings
 from src.shared.logging import get_logger
@@ -13,21 +14,52 @@ from src.shared.logging import get_logger
 logger = get_logger(__name__)
 
 
+# One Chromium process shared by every caller; launching costs hundreds of ms
+_playwright: Playwright | None = None
+_browser: Browser | None = None
+_browser_lock = asyncio.Lock()
+
+
+async def _launch_browser() -> Browser:
+    global _playwright, _browser
+    async with _browser_lock:
+        if _browser is not None and _browser.is_connected():
+            return _browser
+        if _playwright is None:
+            _playwright = await async_playwright().start()
+        _browser = await _playwright.chromium.launch(
+            headless=settings.playwright_headless,
+            args=[
+                "--no-sandbox",
+            ],
+        )
+        return _browser
+
+
 @asynccontextmanager
 async def get_browser() -> AsyncIterator[Browser]:
-    """Launch a headless Chromium browser for page scraping."""
-    pw = await async_playwright().start()
-    browser = await pw.chromium.launch(
-        headless=settings.playwright_headless,
-        args=[
-            "--no-sandbox",
-        ],
-    )
-    try:
-        yield browser
-    finally:
-        await browser.close()
-        await pw.stop()
+    """Yield the shared headless Chromium browser, launching it on first use.
+
+    The browser outlives the ``async with`` block; callers isolate their
+    work in contexts via :func:`get_page`. Call :func:`shutdown_browser` on
+    application shutdown.
+    """
+    browser = _browser
+    if browser is None or not browser.is_connected():
+        browser = await _launch_browser()
+    yield browser
+
+
+async def shutdown_browser() -> None:
+    """Close the shared browser and stop Playwright."""
+    global _playwright, _browser
+    async with _browser_lock:
+        if _browser is not None:
+            await _browser.close()
+            _browser = None
+        if _playwright is not None:
+            await _playwright.stop()
+            _playwright = None
 
 
 @asynccontextmanager
@@ -36,7 +68,8 @@ async def get_page(browser: Browser, locale: str = "en-US") -> AsyncIterator[Pag
 
     Uses Playwright's default User-Agent (which matches the bundled
     Chromium version) to avoid fingerprint mismatches that trigger
-    bot detection.
+    bot detection. Each page gets its own context, closed afterwards, so
+    no cookies, storage or service workers carry over between scrapes.
     """
     context = await browser.new_context(
         viewport={"width": 1920, "height": 1080},
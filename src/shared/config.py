@@ -20,7 +20,8 @@ class Settings(BaseSettings):
     phoenix_enabled: bool = True
     phoenix_port: int = 6006
 
-    model_config = {"env_file": "config/.env.local", "extra": "ignore"}
+    # Read once at import and shared by every module; never mutated at runtime
+    model_config = {"env_file": "config/.env.local", "extra": "ignore", "frozen": True}
 
 
 settings = Settings()
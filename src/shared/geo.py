@@ -2,38 +2,84 @@
 
 from __future__ import annotations
 
+import atexit
+import threading
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
 from src.shared.config import settings
 from src.shared.logging import get_logger
 
 logger = get_logger(__name__)
 
+if TYPE_CHECKING:
+    import geoip2.database
+
 _DEFAULT_MARKET = settings.default_market
 
+_reader: geoip2.database.Reader | None = None
+_reader_lock = threading.Lock()
+
+
+def _get_reader() -> geoip2.database.Reader:
+    """Open the GeoLite2 database once and share the reader across lookups."""
+    global _reader
+    if _reader is None:
+        with _reader_lock:
+            if _reader is None:
+                import geoip2.database
+
+                _reader = geoip2.database.Reader(settings.geoip_db_path)
+                atexit.register(_reader.close)
+    return _reader
+
+
+def _reset_reader() -> None:
+    """Close and forget the shared reader (used by tests)."""
+    global _reader
+    with _reader_lock:
+        if _reader is not None:
+            atexit.unregister(_reader.close)
+            _reader.close()
+            _reader = None
+
+
+class _NoCountryError(Exception):
+    """The database has no country for an address (e.g. a private range)."""
+
+
+@lru_cache(maxsize=4096)
+def _lookup_country(ip_address: str) -> str:
+    """Return the lowercased country code for an IP, raising if it cannot be resolved.
+
+    Only successful lookups are memoized (``lru_cache`` does not store
+    exceptions), so a missing database or transient failure is retried.
+    """
+    country: str | None = _get_reader().country(ip_address).country.iso_code
+    if not country:
+        raise _NoCountryError(ip_address)
+    return country.lower()
+
 
 def detect_market(ip_address: str) -> str:
     """Resolve IP address to market code using MaxMind GeoLite2.
 
     Returns ISO country code lowercased (e.g. 'il', 'us').
     Falls back to 'us' if lookup fails or database is unavailable.
+    Successful results are memoized per IP, since a session repeats its address.
     """
     try:
-        import geoip2.database
+        return _lookup_country(ip_address)
     except ImportError:
         logger.warning("geoip2 not installed, defaulting to market '%s'", _DEFAULT_MARKET)
-        return _DEFAULT_MARKET
-
-    try:
-        with geoip2.database.Reader(settings.geoip_db_path) as reader:
-            response = reader.country(ip_address)
-            country = response.country.iso_code
-            if country:
-                return country.lower()
     except FileNotFoundError:
         logger.warning(
             "GeoLite2 database not found at '%s', defaulting to market '%s'",
             settings.geoip_db_path,
             _DEFAULT_MARKET,
         )
+    except _NoCountryError:
+        logger.debug("No country for '%s', defaulting to market '%s'", ip_address, _DEFAULT_MARKET)
     except Exception:
         logger.warning("GeoIP lookup failed for '%s', defaulting to market '%s'", ip_address, _DEFAULT_MARKET)
 
@@ -0,0 +1,42 @@
+"""Process-wide httpx client shared by the outbound HTTP callers."""
+
+from __future__ import annotations
+
+import httpx
+
+# Timeouts for every outbound request live here so callers stay consistent:
+# fail fast when a host is unreachable, but give slow search/shop pages
+# enough time to stream their HTML.
+CONNECT_TIMEOUT = 5.0
+REQUEST_TIMEOUT = 20.0
+
+# Fan-out across many shop domains needs more than httpx's default pool of
+# 10 connections; keep every socket warm so repeated hosts skip the TLS
+# handshake.
+MAX_CONNECTIONS = 100
+
+_client: httpx.AsyncClient | None = None
+
+
+def get_shared_client() -> httpx.AsyncClient:
+    """Return the shared client, creating it inside the running event loop."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(REQUEST_TIMEOUT, connect=CONNECT_TIMEOUT),
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_CONNECTIONS,
+            ),
+            http2=True,
+        )
+    return _client
+
+
+async def close_shared_client() -> None:
+    """Close the shared client (called on app shutdown)."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -8,17 +8,21 @@ integration.
 from __future__ import annotations
 
 import contextvars
-import json
 import logging
 import os
 import sys
 from datetime import datetime, timezone
+from typing import TYPE_CHECKING
 
+import orjson
 from opentelemetry import trace
-from opentelemetry.sdk.trace import SpanProcessor, TracerProvider
 
 from src.shared.config import settings
 
+if TYPE_CHECKING:
+    from opentelemetry.context import Context
+    from opentelemetry.sdk.trace import Span, SpanProcessor
+
 # ---------------------------------------------------------------------------
 # Session ID context
 # ---------------------------------------------------------------------------
@@ -54,16 +58,18 @@ class JsonFormatter(logging.Formatter):
     """Emit each log record as a single JSON object on one line."""
 
     def format(self, record: logging.LogRecord) -> str:
-        payload: dict[str, str] = {
-            "timestamp": datetime.now(timezone.utc).isoformat(),
+        payload: dict[str, object] = {
+            # When the record was created, not when it reached the handler
+            "timestamp": datetime.fromtimestamp(record.created, tz=timezone.utc),
             "level": record.levelname,
             "logger": record.name,
-            "message": record.getMessage(),
+            # Skip %-formatting entirely for argument-less messages
+            "message": record.getMessage() if record.args else str(record.msg),
             "session_id": getattr(record, "session_id", ""),
         }
         if record.exc_info and record.exc_info[1] is not None:
             payload["exception"] = self.formatException(record.exc_info)
-        return json.dumps(payload)
+        return orjson.dumps(payload, option=orjson.OPT_UTC_Z).decode()
 
 
 _LEVEL_COLORS: dict[str, str] = {
@@ -144,26 +150,22 @@ def get_logger(name: str) -> logging.Logger:
 _tracer_initialized = False
 
 
-class SessionIdSpanProcessor(SpanProcessor):
-    """Stamp ``session.id`` on every span from the contextvars session ID.
+def _session_id_span_processor() -> SpanProcessor:
+    """Build the processor that stamps ``session.id`` on every span.
 
     Phoenix (and the OpenInference convention) uses the ``session.id``
-    attribute to group spans into user sessions.
+    attribute to group spans into user sessions. The class is defined here
+    rather than at module level so importing this module skips the SDK.
     """
+    from opentelemetry.sdk.trace import SpanProcessor
 
-    def on_start(self, span: trace.Span, parent_context: object = None) -> None:  # type: ignore[override]
-        session_id = _session_id_var.get()
-        if session_id:
-            span.set_attribute("session.id", session_id)
-
-    def on_end(self, span: trace.Span) -> None:  # type: ignore[override]
-        pass
+    class SessionIdSpanProcessor(SpanProcessor):
+        def on_start(self, span: Span, parent_context: Context | None = None) -> None:
+            session_id = _session_id_var.get()
+            if session_id:
+                span.set_attribute("session.id", session_id)
 
-    def shutdown(self) -> None:
-        pass
-
-    def force_flush(self, timeout_millis: int = 30000) -> bool:
-        return True
+    return SessionIdSpanProcessor()
 
 
 def _init_tracer_provider() -> None:
@@ -174,13 +176,14 @@ def _init_tracer_provider() -> None:
     _tracer_initialized = True
 
     from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
     from opentelemetry.sdk.trace.export import BatchSpanProcessor
 
     resource = Resource.create({"service.name": "smart-shopping-agent"})
     provider = TracerProvider(resource=resource)
 
     # Always add session ID processor first
-    provider.add_span_processor(SessionIdSpanProcessor())
+    provider.add_span_processor(_session_id_span_processor())
 
     # Determine OTLP endpoint
     endpoint = os.environ.get("OTEL_EXPORTER_OTLP_ENDPOINT") or getattr(
@@ -200,12 +203,10 @@ def _init_tracer_provider() -> None:
 
     if settings.log_format == "console" and not endpoint:
         # Console-only mode when no OTLP endpoint is configured
-        from opentelemetry.sdk.trace.export import (
-            ConsoleSpanExporter,
-            SimpleSpanProcessor,
-        )
+        from opentelemetry.sdk.trace.export import ConsoleSpanExporter
 
-        provider.add_span_processor(SimpleSpanProcessor(ConsoleSpanExporter()))
+        # Batched so printing spans never blocks the request that ended them
+        provider.add_span_processor(BatchSpanProcessor(ConsoleSpanExporter()))
 
     trace.set_tracer_provider(provider)
 
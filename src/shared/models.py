@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from enum import Enum
+from enum import Enum, StrEnum
 
 from pydantic import BaseModel, Field
 
@@ -16,6 +16,14 @@ class SearchStatus(str, Enum):
     FAILED = "failed"
 
 
+class StatusCode(StrEnum):
+    """Machine-readable outcome recorded alongside the human status messages."""
+
+    NO_SEARCH_RESULTS = "no_search_results"
+    NO_ECOMMERCE_SITES = "no_ecommerce_sites"
+    SEARCH_FAILED = "search_failed"
+
+
 class Seller(BaseModel):
     name: str
     price: float | None = None
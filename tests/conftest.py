@@ -1,20 +1,36 @@
 """Shared test configuration.
 
 Sets DATABASE_URL to in-memory SQLite before any application modules are imported,
-ensuring test isolation from the real database.
+ensuring test isolation from the real database. The in-memory database
+lives in the test process, so every pytest-xdist worker (``pytest -n auto``)
+gets its own private copy and tables without per-worker file names.
 """
 
 from __future__ import annotations
 
+import asyncio
 import os
 
 os.environ["DATABASE_URL"] = "sqlite+aiosqlite://"
 
 import pytest  # noqa: E402
 
+try:
+    import uvloop  # noqa: E402
+except ImportError:  # Windows, where uvicorn[standard] does not pull it in
+    uvloop = None
+
 from src.backend.db.engine import init_db  # noqa: E402
 
 
+@pytest.fixture(scope="session")
+def event_loop_policy() -> asyncio.AbstractEventLoopPolicy:
+    """Run test loops on uvloop when available, the same loop uvicorn runs the app on."""
+    if uvloop is not None:
+        return uvloop.EventLoopPolicy()
+    return asyncio.DefaultEventLoopPolicy()
+
+
 @pytest.fixture(autouse=True, scope="session")
 async def _create_tables():
     """Create database tables once for the entire test session."""
@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+import asyncio
+
 import pytest
 
 from src.mcp_servers.web_scraper_mcp.db_cache import (
@@ -9,53 +11,54 @@ from src.mcp_servers.web_scraper_mcp.db_cache import (
     save_strategy,
     update_success_rate,
 )
-from src.mcp_servers.web_scraper_mcp.strategy import ScrapingStrategy
+from src.mcp_servers.web_scraper_mcp.strategy import (
+    ScrapingStrategy,
+    cached_strategy,
+    remember_strategy,
+)
 
+# Run on the session loop the tables were created on, so the pooled
+# aiosqlite connection is reused instead of bouncing between loops
+pytestmark = pytest.mark.asyncio(loop_scope="session")
 
-@pytest.mark.asyncio
-async def test_save_and_get_roundtrip():
-    strategy = ScrapingStrategy(
-        product_container=".product-card",
-        name_selector="h2 a",
-        price_selector=".price",
-        currency_hint="USD",
+
+async def test_save_get_and_upsert():
+    """Round-trip, miss and upsert, with the three lookups issued concurrently."""
+    roundtrip, unknown, upsert = (
+        "test-roundtrip.com",
+        "nonexistent-domain-12345.com",
+        "test-upsert.com",
+    )
+    await save_strategy(
+        roundtrip,
+        ScrapingStrategy(
+            product_container=".product-card",
+            name_selector="h2 a",
+            price_selector=".price",
+            currency_hint="USD",
+        ),
+    )
+    await save_strategy(upsert, ScrapingStrategy(product_container=".old-card", name_selector="h2"))
+    await save_strategy(upsert, ScrapingStrategy(product_container=".new-card", name_selector="h3"))
+
+    cached, missing, upserted = await asyncio.gather(
+        get_cached_strategy(roundtrip),
+        get_cached_strategy(unknown),
+        get_cached_strategy(upsert),
     )
-    await save_strategy("test-roundtrip.com", strategy)
 
-    cached = await get_cached_strategy("test-roundtrip.com")
     assert cached is not None
     assert cached.product_container == ".product-card"
     assert cached.name_selector == "h2 a"
     assert cached.currency_hint == "USD"
 
+    assert missing is None
 
-@pytest.mark.asyncio
-async def test_get_returns_none_for_unknown():
-    result = await get_cached_strategy("nonexistent-domain-12345.com")
-    assert result is None
-
+    assert upserted is not None
+    assert upserted.product_container == ".new-card"
+    assert upserted.name_selector == "h3"
 
-@pytest.mark.asyncio
-async def test_save_upsert():
-    strategy1 = ScrapingStrategy(
-        product_container=".old-card",
-        name_selector="h2",
-    )
-    await save_strategy("test-upsert.com", strategy1)
 
-    strategy2 = ScrapingStrategy(
-        product_container=".new-card",
-        name_selector="h3",
-    )
-    await save_strategy("test-upsert.com", strategy2)
-
-    cached = await get_cached_strategy("test-upsert.com")
-    assert cached is not None
-    assert cached.product_container == ".new-card"
-    assert cached.name_selector == "h3"
-
-
-@pytest.mark.asyncio
 async def test_success_rate_decay():
     strategy = ScrapingStrategy(
         product_container=".card",
@@ -79,7 +82,17 @@ async def test_success_rate_decay():
     assert cached is None
 
 
-@pytest.mark.asyncio
+async def test_failure_evicts_remembered_strategy():
+    strategy = ScrapingStrategy(product_container=".card", name_selector="h2")
+    remember_strategy("test-evict.com", strategy)
+
+    await update_success_rate("test-evict.com", success=True)
+    assert cached_strategy("test-evict.com") == strategy
+
+    await update_success_rate("test-evict.com", success=False)
+    assert cached_strategy("test-evict.com") is None
+
+
 async def test_success_rate_recovery():
     strategy = ScrapingStrategy(
         product_container=".card",
@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+import pytest
+
 from src.mcp_servers.web_search_mcp.ecommerce_detector import (
     EcommerceSignal,
     detect_ecommerce,
@@ -11,20 +13,36 @@ from src.mcp_servers.web_search_mcp.ecommerce_detector import (
 
 
 class TestExtractDomain:
-    def test_strips_www_prefix(self):
-        assert extract_domain("https://www.amazon.com/dp/123") == "amazon.com"
-
-    def test_without_www(self):
-        assert extract_domain("https://ksp.co.il/product/123") == "ksp.co.il"
-
-    def test_with_port(self):
-        assert extract_domain("http://localhost:8080/shop") == "localhost"
-
-    def test_empty_url(self):
-        assert extract_domain("") == ""
+    @pytest.mark.parametrize(
+        ("url", "expected"),
+        [
+            pytest.param("https://www.amazon.com/dp/123", "amazon.com", id="strips_www_prefix"),
+            pytest.param("https://ksp.co.il/product/123", "ksp.co.il", id="without_www"),
+            pytest.param("http://localhost:8080/shop", "localhost", id="with_port"),
+            pytest.param("", "", id="empty_url"),
+        ],
+    )
+    def test_extract_domain(self, url, expected):
+        assert extract_domain(url) == expected
 
 
 class TestDetectEcommerce:
+    @pytest.mark.parametrize(
+        ("url", "title", "expected"),
+        [
+            pytest.param("https://en.wikipedia.org/wiki/Microwave", "", False, id="wikipedia"),
+            pytest.param("https://mysite.com/shop/item-456", "", True, id="path_pattern_shop"),
+            pytest.param(
+                "https://example.co.il/page",
+                "מחיר מיוחד - משלוח חינם - הזמנה עכשיו",
+                True,
+                id="hebrew_keywords",
+            ),
+        ],
+    )
+    def test_verdict(self, url, title, expected):
+        assert detect_ecommerce(url, title=title).is_ecommerce is expected
+
     def test_known_ecommerce_domain(self):
         signal = detect_ecommerce("https://www.amazon.com/dp/B09ABC")
         assert signal.is_ecommerce is True
@@ -42,9 +60,14 @@ class TestDetectEcommerce:
         assert signal.confidence == 0.0
         assert "known_non_ecommerce" in signal.signals
 
-    def test_wikipedia_non_ecommerce(self):
-        signal = detect_ecommerce("https://en.wikipedia.org/wiki/Microwave")
-        assert signal.is_ecommerce is False
+    def test_known_domain_matches_subdomains_only(self):
+        assert (
+            "known_ecommerce:amazon.com" in detect_ecommerce("https://smile.amazon.com/x").signals
+        )
+        assert not any(
+            s.startswith("known_ecommerce")
+            for s in detect_ecommerce("https://notamazon.com/x").signals
+        )
 
     def test_path_pattern_products(self):
         signal = detect_ecommerce("https://unknown-shop.com/products/widget-123")
@@ -52,9 +75,11 @@ class TestDetectEcommerce:
         assert signal.confidence >= 0.3
         assert any("path_pattern" in s for s in signal.signals)
 
-    def test_path_pattern_shop(self):
-        signal = detect_ecommerce("https://mysite.com/shop/item-456")
-        assert signal.is_ecommerce is True
+    def test_path_pattern_requires_whole_segment(self):
+        assert "path_pattern:products" in detect_ecommerce("https://a-shop.com/Products/x").signals
+        assert not any(
+            "path_pattern" in s for s in detect_ecommerce("https://a-shop.com/shopping/x").signals
+        )
 
     def test_keywords_in_title(self):
         signal = detect_ecommerce(
@@ -64,12 +89,41 @@ class TestDetectEcommerce:
         assert signal.is_ecommerce is True
         assert any("keywords" in s for s in signal.signals)
 
-    def test_hebrew_keywords(self):
+    def test_known_domain_with_path_still_scans_keywords(self):
         signal = detect_ecommerce(
-            "https://example.co.il/page",
-            title="מחיר מיוחד - משלוח חינם - הזמנה עכשיו",
+            "https://www.amazon.com/dp/B09ABC", title="Buy now - free shipping"
         )
-        assert signal.is_ecommerce is True
+        assert any(s.startswith("keywords:") for s in signal.signals)
+        assert signal.confidence > 1.1
+
+    def test_product_page_outranks_search_page_on_same_shop(self):
+        ranked = identify_ecommerce_sites(
+            [
+                {
+                    "url": "https://www.amazon.com/s?k=kettle",
+                    "title": "Buy kettle - price - free shipping - order",
+                },
+                {
+                    "url": "https://www.amazon.com/dp/B1",
+                    "title": "Buy kettle - price - free shipping - order",
+                },
+            ]
+        )
+        assert [s.url for s in ranked] == [
+            "https://www.amazon.com/dp/B1",
+            "https://www.amazon.com/s?k=kettle",
+        ]
+
+    def test_known_domain_without_path_still_scans_keywords(self):
+        signal = detect_ecommerce("https://ksp.co.il/web/cat/1234", title="Buy now")
+        assert any(s.startswith("keywords:") for s in signal.signals)
+
+    def test_repeated_calls_return_independent_signals(self):
+        first = detect_ecommerce("https://www.amazon.com/dp/B09ABC")
+        first.signals.append("mutated")
+        second = detect_ecommerce("https://www.amazon.com/dp/B09ABC")
+        assert "mutated" not in second.signals
+        assert second.domain == "amazon.com"
 
     def test_unknown_no_signals(self):
         signal = detect_ecommerce(
@@ -118,6 +172,18 @@ class TestIdentifyEcommerceSites:
         assert results[0].domain == "amazon.com"
         assert results[0].confidence >= results[1].confidence
 
+    def test_top_k_keeps_most_confident(self):
+        urls_data = [
+            {"url": "https://unknown-shop.com/products/123", "title": "", "snippet": ""},
+            {"url": "https://www.amazon.com/dp/B123", "title": "", "snippet": ""},
+            {"url": "https://ksp.co.il/web/item/1", "title": "", "snippet": ""},
+        ]
+        results = identify_ecommerce_sites(urls_data, top_k=2)
+        assert [r.domain for r in results] == ["amazon.com", "ksp.co.il"]
+        assert (
+            identify_ecommerce_sites(urls_data, top_k=2) == identify_ecommerce_sites(urls_data)[:2]
+        )
+
     def test_empty_input(self):
         assert identify_ecommerce_sites([]) == []
 
@@ -3,14 +3,32 @@
 from __future__ import annotations
 
 import json
+from dataclasses import asdict
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
 
+import pytest
+
+from src.mcp_servers.web_scraper_mcp import strategy as strategy_mod
 from src.mcp_servers.web_scraper_mcp.strategy import (
     ScrapingStrategy,
     _detect_currency,
     _looks_like_price,
+    cached_strategy,
+    clear_strategy_cache,
+    discover_strategy,
+    forget_strategy,
+    remember_strategy,
 )
 
 
+@pytest.fixture(autouse=True)
+def _clear_strategy_cache():
+    clear_strategy_cache()
+    yield
+    clear_strategy_cache()
+
+
 class TestScrapingStrategy:
     def test_json_roundtrip(self):
         strategy = ScrapingStrategy(
@@ -31,6 +49,12 @@ class TestScrapingStrategy:
         assert parsed.price_selector == "[class*='price']"
         assert parsed.currency_hint == "USD"
 
+    def test_to_dict_matches_asdict(self):
+        strategy = ScrapingStrategy(
+            product_container=".card", name_selector="h2", currency_hint="ILS"
+        )
+        assert strategy.to_dict() == asdict(strategy)
+
     def test_from_json_unknown_fields_ignored(self):
         data = json.dumps({
             "product_container": ".item",
@@ -50,43 +74,122 @@ class TestScrapingStrategy:
 
 
 class TestLooksLikePrice:
-    def test_usd_price(self):
-        assert _looks_like_price("$299.99") is True
+    @pytest.mark.parametrize(
+        ("text", "expected"),
+        [
+            pytest.param("$299.99", True, id="usd"),
+            pytest.param("₪1,299", True, id="nis"),
+            pytest.param("€49.90", True, id="euro"),
+            pytest.param("299.99", True, id="plain_decimal"),
+            pytest.param("299", True, id="just_digits"),
+            pytest.param("no price here", False, id="no_digits"),
+            pytest.param("", False, id="empty"),
+        ],
+    )
+    def test_looks_like_price(self, text, expected):
+        assert _looks_like_price(text) is expected
 
-    def test_nis_price(self):
-        assert _looks_like_price("₪1,299") is True
 
-    def test_euro_price(self):
-        assert _looks_like_price("€49.90") is True
+class TestDetectCurrency:
+    @pytest.mark.parametrize(
+        ("text", "expected"),
+        [
+            pytest.param("$29.99", "USD", id="usd"),
+            pytest.param("₪1,299", "ILS", id="ils"),
+            pytest.param("€49.90", "EUR", id="eur"),
+            pytest.param("£19.99", "GBP", id="gbp"),
+            pytest.param("1299 NIS", "ILS", id="nis_text"),
+            pytest.param("299", "", id="no_currency"),
+            pytest.param("$49 / 180 nis", "ILS", id="priority_independent_of_position"),
+        ],
+    )
+    def test_detect_currency(self, text, expected):
+        assert _detect_currency(text) == expected
+
+
+class TestDiscoverStrategy:
+    async def test_css_candidates_result(self):
+        page = AsyncMock()
+        page.url = "https://shop.example.com/search?q=laptop"
+        page.evaluate.return_value = {
+            "method": "css_candidates",
+            "container": ".product-card",
+            "count": 12,
+            "name": "h2 a",
+            "price": "[class*='price']",
+            "image": "img",
+            "url": "a[href]",
+            "priceText": "₪1,299",
+        }
+
+        strategy = await discover_strategy(page)
+
+        assert strategy == ScrapingStrategy(
+            product_container=".product-card",
+            name_selector="h2 a",
+            price_selector="[class*='price']",
+            image_selector="img",
+            url_selector="a[href]",
+            currency_hint="ILS",
+        )
+        page.evaluate.assert_awaited_once()
+        page.query_selector_all.assert_not_called()
+
+    async def test_price_pattern_result_uses_fallback_selectors(self):
+        page = AsyncMock()
+        page.url = "https://shop.example.com/search?q=laptop"
+        page.evaluate.return_value = {
+            "method": "price_pattern",
+            "container": "div.tile",
+            "count": 5,
+            "name": "",
+            "price": "",
+        }
+
+        strategy = await discover_strategy(page)
+
+        assert strategy == ScrapingStrategy(
+            product_container="div.tile",
+            name_selector="a",
+            price_selector="span",
+            discovery_method="price_pattern",
+        )
 
-    def test_plain_number_with_decimal(self):
-        assert _looks_like_price("299.99") is True
+    async def test_returns_none_when_nothing_found(self):
+        page = AsyncMock()
+        page.url = "https://shop.example.com/search?q=laptop"
+        page.evaluate.return_value = None
 
-    def test_no_digits(self):
-        assert _looks_like_price("no price here") is False
+        assert await discover_strategy(page) is None
 
-    def test_empty_string(self):
-        assert _looks_like_price("") is False
+    async def test_returns_none_when_script_fails(self):
+        page = AsyncMock()
+        page.url = "https://shop.example.com/search?q=laptop"
+        page.evaluate.side_effect = RuntimeError("execution context destroyed")
 
-    def test_just_digits(self):
-        assert _looks_like_price("299") is True
+        assert await discover_strategy(page) is None
 
 
-class TestDetectCurrency:
-    def test_detect_usd(self):
-        assert _detect_currency("$29.99") == "USD"
+class TestStrategyCache:
+    _STRATEGY = ScrapingStrategy(product_container=".card", name_selector="h2")
+
+    def test_remembers_per_domain(self):
+        remember_strategy("shop.example.com", self._STRATEGY)
+
+        assert cached_strategy("shop.example.com") == self._STRATEGY
+        assert cached_strategy("other.example.com") is None
 
-    def test_detect_ils(self):
-        assert _detect_currency("₪1,299") == "ILS"
+    def test_forget_strategy(self):
+        remember_strategy("shop.example.com", self._STRATEGY)
+        forget_strategy("shop.example.com")
 
-    def test_detect_eur(self):
-        assert _detect_currency("€49.90") == "EUR"
+        assert cached_strategy("shop.example.com") is None
 
-    def test_detect_gbp(self):
-        assert _detect_currency("£19.99") == "GBP"
+    def test_remembered_strategy_expires(self, monkeypatch):
+        now = 1000.0
+        monkeypatch.setattr(strategy_mod, "time", SimpleNamespace(monotonic=lambda: now))
 
-    def test_detect_nis_text(self):
-        assert _detect_currency("1299 NIS") == "ILS"
+        remember_strategy("shop.example.com", self._STRATEGY)
+        now += strategy_mod._STRATEGY_CACHE_TTL_SECONDS + 1
 
-    def test_no_currency(self):
-        assert _detect_currency("299") == ""
+        assert cached_strategy("shop.example.com") is None
@@ -2,12 +2,48 @@
 
 from __future__ import annotations
 
-from unittest.mock import AsyncMock, patch
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+from urllib.parse import urlparse
 
 import pytest
 
-from src.mcp_servers.web_scraper_mcp.scraper import extract_domain, parse_price, scrape_page
+from src.mcp_servers.web_scraper_mcp import scraper as scraper_mod
+from src.mcp_servers.web_scraper_mcp.scraper import (
+    _extract_single_product,
+    _extract_with_strategy,
+    _query_first_n,
+    _scrape_loaded_page,
+    clear_page_cache,
+    extract_domain,
+    parse_price,
+    scrape_page,
+    scrape_pages,
+)
+from src.mcp_servers.web_scraper_mcp.server import call_tool
 from src.mcp_servers.web_scraper_mcp.strategy import ScrapingStrategy
+from src.shared.models import ProductResult, Seller
+
+
+def _element_array(elements: list) -> AsyncMock:
+    """Mimic the JSHandle that page.evaluate_handle returns for a node array."""
+    properties = {}
+    for i, element in enumerate(elements):
+        handle = MagicMock()
+        handle.as_element.return_value = element
+        properties[str(i)] = handle
+    array = AsyncMock()
+    array.get_properties.return_value = properties
+    return array
+
+
+@pytest.fixture(autouse=True)
+def _clear_page_cache():
+    clear_page_cache()
+    yield
+    clear_page_cache()
 
 
 class TestParsePrice:
@@ -35,6 +71,26 @@ class TestParsePrice:
     def test_thousands_comma(self):
         assert parse_price("1,299") == 1299.0
 
+    @pytest.mark.parametrize(
+        ("text", "expected"),
+        [
+            pytest.param("€1.299", 1299.0, id="thousands_dot"),
+            pytest.param("1,299,000", 1299000.0, id="repeated_thousands_comma"),
+            pytest.param("1.299.999,5", 1299999.5, id="european_one_decimal"),
+            pytest.param("1,299,99", 1299.99, id="comma_grouped_with_decimal"),
+            pytest.param(".", None, id="separator_only"),
+            pytest.param("£1,234.567", 1234.567, id="three_digit_decimal_after_grouping"),
+            pytest.param("1 299,99 €", 1299.99, id="space_grouped"),
+            pytest.param("$19.99 - $29.99", None, id="price_range"),
+            pytest.param("Was $1,299.99 Now $999.99", None, id="was_now_pair"),
+            pytest.param("12.99.", None, id="trailing_separator"),
+            pytest.param("1.2.3", None, id="short_group"),
+            pytest.param("1,299.999.5", None, id="mixed_grouping"),
+        ],
+    )
+    def test_separator_heuristic(self, text, expected):
+        assert parse_price(text) == expected
+
 
 class TestExtractDomain:
     def test_strips_www(self):
@@ -43,12 +99,43 @@ class TestExtractDomain:
     def test_without_www(self):
         assert extract_domain("https://ksp.co.il/product/1") == "ksp.co.il"
 
+    @pytest.mark.parametrize(
+        "url",
+        [
+            "",
+            "ksp.co.il/no-scheme",
+            "//cdn.example.com/x",
+            "https://u:p@Shop.Example.COM:8443/x",
+            "http://[::1]:80/x",
+            "https://[2001:DB8::1]/p",
+            "https://user@[2001:db8::1]:8443/p",
+            "https://www.shop.com:443/p",
+            "https://user:pw@www.shop.com/p",
+            "https://user@shop.com@evil.com/p",
+            "https://a.com?next=//b.com",
+            "https://a.com#frag",
+            "mailto:sales@shop.com",
+        ],
+    )
+    def test_matches_urlparse_hostname(self, url):
+        host = urlparse(url).hostname or ""
+        assert extract_domain(url) == host.removeprefix("www.")
+
+    def test_rejects_malformed_ipv6_like_urlparse(self):
+        with pytest.raises(ValueError):
+            extract_domain("https://[::1")
+
+    def test_returns_interned_string(self):
+        first = extract_domain("https://www.shop-" + "intern.com/a")
+        assert first is extract_domain("https://shop-intern.com/b")
+
 
 class TestScrapePageWithNoStrategy:
-    @pytest.mark.asyncio
     async def test_returns_empty_when_no_strategy_found(self):
         mock_page = AsyncMock()
-        mock_page.query_selector_all.return_value = []  # No containers found
+        mock_page.url = "https://shop.example.com/search?q=laptop"
+        mock_page.goto.return_value = None
+        mock_page.evaluate_handle.return_value = _element_array([])  # No containers found
 
         mock_browser = AsyncMock()
 
@@ -68,7 +155,6 @@ class TestScrapePageWithNoStrategy:
 
 
 class TestScrapePageWithCachedStrategy:
-    @pytest.mark.asyncio
     async def test_uses_cached_strategy(self):
         strategy = ScrapingStrategy(
             product_container=".product-card",
@@ -76,31 +162,20 @@ class TestScrapePageWithCachedStrategy:
             price_selector=".price",
         )
 
-        mock_name_el = AsyncMock()
-        mock_name_el.inner_text.return_value = "Test Laptop"
-
-        mock_price_el = AsyncMock()
-        mock_price_el.inner_text.return_value = "$999.99"
-
         mock_container = AsyncMock()
-
-        async def mock_query_selector(selector):
-            if selector == "h2":
-                return mock_name_el
-            if selector == ".price":
-                return mock_price_el
-            return None
-
-        mock_container.query_selector = mock_query_selector
+        mock_container.evaluate.return_value = {"name": " Test Laptop ", "price": "$999.99"}
 
         mock_page = AsyncMock()
-        mock_page.query_selector_all.return_value = [mock_container]
+        mock_page.goto.return_value = None
+        mock_page.evaluate_handle.return_value = _element_array([mock_container])
 
         mock_browser = AsyncMock()
 
         with (
             patch("src.mcp_servers.web_scraper_mcp.scraper.get_page") as mock_get_page,
-            patch("src.mcp_servers.web_scraper_mcp.scraper.get_cached_strategy", return_value=strategy),
+            patch(
+                "src.mcp_servers.web_scraper_mcp.scraper.get_cached_strategy", return_value=strategy
+            ),
             patch("src.mcp_servers.web_scraper_mcp.scraper.update_success_rate") as mock_update,
         ):
             mock_ctx = AsyncMock()
@@ -115,10 +190,14 @@ class TestScrapePageWithCachedStrategy:
         assert results[0].sellers[0].price == 999.99
         assert results[0].sellers[0].currency == "USD"
         mock_update.assert_awaited_once_with("shop.example.com", success=True)
+        # Every field of the container is read in one round trip
+        mock_container.evaluate.assert_awaited_once()
+        _, selectors = mock_container.evaluate.await_args.args
+        assert selectors["name"] == "h2"
+        assert selectors["price"] == ".price"
 
 
 class TestScrapePageCachedStrategyFailure:
-    @pytest.mark.asyncio
     async def test_re_discovers_on_cached_failure(self):
         cached_strategy = ScrapingStrategy(
             product_container=".old-selector",
@@ -129,41 +208,46 @@ class TestScrapePageCachedStrategyFailure:
             name_selector="h3",
         )
 
-        mock_name_el = AsyncMock()
-        mock_name_el.inner_text.return_value = "New Product"
-
         mock_container = AsyncMock()
 
-        async def mock_qs(selector):
-            if selector == "h3":
-                return mock_name_el
-            return None
+        async def mock_evaluate(expression, selectors):
+            return {"name": "New Product" if selectors["name"] == "h3" else None}
 
-        mock_container.query_selector = mock_qs
+        mock_container.evaluate = mock_evaluate
 
         mock_page = AsyncMock()
+        mock_page.url = "https://shop.example.com/products"
+        mock_page.goto.return_value = None
 
         call_count = 0
 
-        async def mock_query_selector_all(selector):
+        async def mock_evaluate_handle(expression, arg):
             nonlocal call_count
             call_count += 1
+            selector, _limit = arg
             if selector == ".old-selector":
-                return []  # Cached strategy fails
+                return _element_array([])  # Cached strategy fails
             if selector == ".new-card":
-                return [mock_container]
-            return []
+                return _element_array([mock_container])
+            return _element_array([])
 
-        mock_page.query_selector_all = mock_query_selector_all
+        mock_page.evaluate_handle = mock_evaluate_handle
 
         mock_browser = AsyncMock()
 
         with (
             patch("src.mcp_servers.web_scraper_mcp.scraper.get_page") as mock_get_page,
-            patch("src.mcp_servers.web_scraper_mcp.scraper.get_cached_strategy", return_value=cached_strategy),
+            patch(
+                "src.mcp_servers.web_scraper_mcp.scraper.get_cached_strategy",
+                return_value=cached_strategy,
+            ),
             patch("src.mcp_servers.web_scraper_mcp.scraper.update_success_rate") as mock_update,
-            patch("src.mcp_servers.web_scraper_mcp.scraper.discover_strategy", return_value=new_strategy),
+            patch(
+                "src.mcp_servers.web_scraper_mcp.scraper.discover_strategy",
+                return_value=new_strategy,
+            ),
             patch("src.mcp_servers.web_scraper_mcp.scraper.save_strategy") as mock_save,
+            patch("src.mcp_servers.web_scraper_mcp.scraper.remember_strategy") as mock_remember,
         ):
             mock_ctx = AsyncMock()
             mock_ctx.__aenter__ = AsyncMock(return_value=mock_page)
@@ -178,3 +262,305 @@ class TestScrapePageCachedStrategyFailure:
         mock_update.assert_awaited_with("shop.example.com", success=False)
         # New strategy should be saved
         mock_save.assert_awaited_once()
+        # Only the strategy that extracted is remembered in-process
+        mock_remember.assert_called_once_with("shop.example.com", new_strategy)
+
+    async def test_re_discovers_when_remembered_strategy_fails(self):
+        remembered = ScrapingStrategy(product_container=".old-card", name_selector="h2")
+        fresh = ScrapingStrategy(product_container=".new-card", name_selector="h3")
+        product = ProductResult(name="New Product")
+
+        async def mock_extract(page, strategy, base_url):
+            return [product] if strategy is fresh else []
+
+        page = MagicMock()
+        page.url = "https://shop.example.com/products"
+        scraper = "src.mcp_servers.web_scraper_mcp.scraper"
+        with (
+            patch(f"{scraper}.get_cached_strategy", return_value=None),
+            patch(f"{scraper}.cached_strategy", return_value=remembered),
+            patch(f"{scraper}.discover_strategy", return_value=fresh) as mock_discover,
+            patch(f"{scraper}._extract_with_strategy", side_effect=mock_extract),
+            patch(f"{scraper}.save_strategy") as mock_save,
+            patch(f"{scraper}.forget_strategy") as mock_forget,
+        ):
+            results = await _scrape_loaded_page(page, page.url, "shop.example.com", "")
+
+        assert results == [product]
+        mock_forget.assert_called_once_with("shop.example.com")
+        mock_discover.assert_awaited_once()
+        # Only the strategy that actually extracted is written back
+        mock_save.assert_awaited_once_with("shop.example.com", fresh)
+
+
+class TestExtractSingleProduct:
+    async def test_maps_evaluated_fields(self):
+        strategy = ScrapingStrategy(
+            product_container=".card", name_selector="h2", currency_hint="USD"
+        )
+        container = AsyncMock()
+        container.evaluate.return_value = {
+            "name": "Kettle\n",
+            "price": " ₪199 ",
+            "url": "/p/kettle",
+            "image": "//cdn.shop.co.il/k.jpg",
+            "brand": " Acme ",
+            "mpn": None,
+        }
+
+        product = await _extract_single_product(
+            container, strategy, "https://shop.co.il/search", "shop.co.il", {}
+        )
+
+        assert product.name == "Kettle"
+        assert product.brand == "Acme"
+        assert product.image_url == "https://cdn.shop.co.il/k.jpg"
+        assert product.model_id  # hashed fallback
+        seller = product.sellers[0]
+        assert (seller.price, seller.currency, seller.url) == (
+            199.0,
+            "ILS",
+            "https://shop.co.il/p/kettle",
+        )
+
+    async def test_detached_container_is_skipped(self):
+        container = AsyncMock()
+        container.evaluate.side_effect = Exception("Element is not attached to the DOM")
+
+        strategy = ScrapingStrategy(product_container=".card", name_selector="h2")
+        assert (
+            await _extract_single_product(container, strategy, "https://x.com", "x.com", {}) is None
+        )
+
+
+class TestExtractWithStrategy:
+    async def test_keeps_container_order_and_drops_empty(self):
+        containers = []
+        for name in ("First", None, "Third"):
+            container = AsyncMock()
+            container.evaluate.return_value = {"name": name}
+            containers.append(container)
+
+        mock_page = AsyncMock()
+        mock_page.evaluate_handle.return_value = _element_array(containers)
+        strategy = ScrapingStrategy(product_container=".card", name_selector="h2")
+
+        products = await _extract_with_strategy(mock_page, strategy, "https://shop.example.com/")
+
+        assert [p.name for p in products] == ["First", "Third"]
+
+
+class TestQueryFirstN:
+    async def test_caps_in_page_and_keeps_document_order(self):
+        elements = [MagicMock(name=f"el{i}") for i in range(3)]
+        array = _element_array(elements)
+        # Property maps are not guaranteed to arrive in index order
+        array.get_properties.return_value = dict(
+            reversed(list(array.get_properties.return_value.items()))
+        )
+
+        mock_page = AsyncMock()
+        mock_page.evaluate_handle.return_value = array
+
+        result = await _query_first_n(mock_page, ".card", 3)
+
+        assert result == elements
+        _, arg = mock_page.evaluate_handle.await_args.args
+        assert list(arg) == [".card", 3]
+        array.dispose.assert_awaited_once()
+
+
+class TestScrapePageCache:
+    async def test_unchanged_page_skips_extraction(self):
+        strategy = ScrapingStrategy(product_container=".card", name_selector="h2")
+
+        mock_container = AsyncMock()
+        mock_container.evaluate.return_value = {"name": "Cached Product"}
+
+        mock_response = AsyncMock()
+        mock_response.headers = {"etag": '"abc123"'}
+
+        mock_page = AsyncMock()
+        mock_page.goto.return_value = mock_response
+        mock_page.evaluate_handle.return_value = _element_array([mock_container])
+
+        with (
+            patch("src.mcp_servers.web_scraper_mcp.scraper.get_page") as mock_get_page,
+            patch(
+                "src.mcp_servers.web_scraper_mcp.scraper.get_cached_strategy", return_value=strategy
+            ) as mock_get_cached,
+            patch("src.mcp_servers.web_scraper_mcp.scraper.update_success_rate"),
+        ):
+            mock_ctx = AsyncMock()
+            mock_ctx.__aenter__ = AsyncMock(return_value=mock_page)
+            mock_ctx.__aexit__ = AsyncMock(return_value=False)
+            mock_get_page.return_value = mock_ctx
+
+            first = await scrape_page(AsyncMock(), "https://shop.example.com/p")
+            second = await scrape_page(AsyncMock(), "https://shop.example.com/p")
+
+        assert [p.name for p in second] == [p.name for p in first] == ["Cached Product"]
+        mock_get_cached.assert_awaited_once()
+        mock_page.evaluate_handle.assert_awaited_once()
+
+    @staticmethod
+    async def _scrape_twice(headers_seq, *, clock=(0.0, 0.0), queries=("", "")):
+        """Scrape the same URL twice; return how many times containers were queried."""
+        strategy = ScrapingStrategy(product_container=".card", name_selector="h2")
+
+        mock_container = AsyncMock()
+        mock_container.evaluate.return_value = {"name": "Product"}
+
+        responses = []
+        for headers in headers_seq:
+            response = MagicMock()
+            response.headers = headers
+            responses.append(response)
+
+        mock_page = AsyncMock()
+        mock_page.goto.side_effect = responses
+        mock_page.evaluate_handle.return_value = _element_array([mock_container])
+
+        with (
+            patch("src.mcp_servers.web_scraper_mcp.scraper.get_page") as mock_get_page,
+            patch(
+                "src.mcp_servers.web_scraper_mcp.scraper.get_cached_strategy", return_value=strategy
+            ),
+            patch("src.mcp_servers.web_scraper_mcp.scraper.update_success_rate"),
+        ):
+            mock_ctx = AsyncMock()
+            mock_ctx.__aenter__ = AsyncMock(return_value=mock_page)
+            mock_ctx.__aexit__ = AsyncMock(return_value=False)
+            mock_get_page.return_value = mock_ctx
+
+            for now, query in zip(clock, queries, strict=True):
+                with patch(
+                    "src.mcp_servers.web_scraper_mcp.scraper.time",
+                    SimpleNamespace(monotonic=lambda now=now: now),
+                ):
+                    await scrape_page(AsyncMock(), "https://shop.example.com/p", query)
+
+        return mock_page.evaluate_handle.await_count
+
+    async def test_changed_validator_re_extracts(self):
+        assert await self._scrape_twice([{"etag": '"v1"'}, {"etag": '"v2"'}]) == 2
+
+    async def test_different_query_re_extracts(self):
+        headers = [{"etag": '"v1"'}] * 2
+        assert await self._scrape_twice(headers, queries=("laptop", "phone")) == 2
+
+    async def test_page_without_validator_is_not_cached(self):
+        assert await self._scrape_twice([{}, {}]) == 2
+
+    async def test_cached_page_expires(self):
+        ttl = scraper_mod._PAGE_CACHE_TTL_SECONDS
+        headers = [{"last-modified": "Tue, 01 Sep 2026 00:00:00 GMT"}] * 2
+        assert await self._scrape_twice(headers, clock=(0.0, ttl + 1)) == 2
+
+
+class TestScrapePages:
+    async def test_preserves_order_and_isolates_failures(self):
+        product = ProductResult(name="Laptop")
+
+        async def fake_scrape_page(browser, url, product_query=""):
+            if "broken" in url:
+                raise RuntimeError("boom")
+            return [product] if "a." in url else []
+
+        urls = ["https://a.example.com", "https://broken.example.com", "https://b.example.com"]
+        with patch(
+            "src.mcp_servers.web_scraper_mcp.scraper.scrape_page", side_effect=fake_scrape_page
+        ):
+            results = await scrape_pages(AsyncMock(), urls)
+
+        assert results[0] == [product]
+        assert isinstance(results[1], RuntimeError)
+        assert results[2] == []
+
+    async def test_respects_concurrency_limit(self):
+        in_flight = 0
+        peak = 0
+
+        async def fake_scrape_page(browser, url, product_query=""):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0)
+            in_flight -= 1
+            return []
+
+        urls = [f"https://shop{i}.example.com" for i in range(6)]
+        with patch(
+            "src.mcp_servers.web_scraper_mcp.scraper.scrape_page", side_effect=fake_scrape_page
+        ):
+            await scrape_pages(AsyncMock(), urls, concurrency=2)
+
+        assert peak == 2
+
+
+class TestCallToolSerialization:
+    async def test_scrape_page_payload_matches_model_dump(self):
+        product = ProductResult(
+            name="Test Laptop",
+            sellers=[Seller(name="shop.example.com", price=999.99, currency="USD")],
+        )
+
+        mock_ctx = AsyncMock()
+        mock_ctx.__aenter__ = AsyncMock(return_value=AsyncMock())
+        mock_ctx.__aexit__ = AsyncMock(return_value=False)
+
+        with (
+            patch("src.mcp_servers.web_scraper_mcp.server.get_browser", return_value=mock_ctx),
+            patch("src.mcp_servers.web_scraper_mcp.server.scrape_page", return_value=[product]),
+        ):
+            result = await call_tool("scrape_page", {"url": "https://shop.example.com/p"})
+
+        payload = json.loads(result[0].text)
+        assert payload == {"products": [product.model_dump()], "status": "ok"}
+
+    async def test_scrape_pages_payload_in_request_order(self):
+        product = ProductResult(name="Test Laptop")
+
+        mock_ctx = AsyncMock()
+        mock_ctx.__aenter__ = AsyncMock(return_value=AsyncMock())
+        mock_ctx.__aexit__ = AsyncMock(return_value=False)
+
+        # A repeated URL keeps its own entry instead of overwriting the first
+        urls = [
+            "https://a.example.com",
+            "https://b.example.com",
+            "https://a.example.com",
+            "https://broken.example.com",
+        ]
+        with (
+            patch("src.mcp_servers.web_scraper_mcp.server.get_browser", return_value=mock_ctx),
+            patch(
+                "src.mcp_servers.web_scraper_mcp.server.scrape_pages",
+                return_value=[[product], [], [product], RuntimeError("boom")],
+            ),
+        ):
+            result = await call_tool("scrape_pages", {"urls": urls})
+
+        payload = json.loads(result[0].text)
+        assert payload == {
+            "results": [
+                {"url": urls[0], "products": [product.model_dump()], "error": None},
+                {"url": urls[1], "products": [], "error": None},
+                {"url": urls[2], "products": [product.model_dump()], "error": None},
+                # A failing URL comes back as its own error entry
+                {"url": urls[3], "products": [], "error": "RuntimeError: boom"},
+            ],
+            "status": "ok",
+        }
+
+    async def test_get_scraping_instructions_returns_strategy_fields(self):
+        strategy = ScrapingStrategy(product_container=".card", name_selector="h2")
+
+        with patch(
+            "src.mcp_servers.web_scraper_mcp.server.get_cached_strategy", return_value=strategy
+        ):
+            result = await call_tool("get_scraping_instructions", {"domain": "shop.example.com"})
+
+        payload = json.loads(result[0].text)
+        assert payload["status"] == "found"
+        assert payload["strategy"] == json.loads(strategy.to_json())
@@ -2,7 +2,9 @@
 
 from __future__ import annotations
 
+import json
 from unittest.mock import AsyncMock, MagicMock, patch
+from urllib.parse import parse_qs, quote_plus, urlsplit
 
 import httpx
 import pytest
@@ -10,10 +12,12 @@ import pytest
 from src.mcp_servers.web_search_mcp.search import (
     SearchResult,
     _extract_ddg_url,
+    _quote_query,
     build_search_url,
     extract_search_results,
     search_products,
 )
+from src.mcp_servers.web_search_mcp.server import call_tool
 
 
 class TestBuildSearchUrl:
@@ -39,12 +43,39 @@ class TestBuildSearchUrl:
         url = build_search_url("מיקרוגל", language="he")
         assert "%D7%A7%D7%A0%D7%99%D7%99%D7%94" in url  # "קנייה" URL-encoded
 
+    def test_quote_query_matches_quote_plus(self):
+        for text in [
+            "galaxy s24 ultra buy online",
+            "a&b=c/d",
+            "מיקרוגל buy online",
+            "50% off ~ sale_1.0-x",
+        ]:
+            assert _quote_query(text) == quote_plus(text)
+
 
 class TestExtractDdgUrl:
     def test_extracts_from_uddg_redirect(self):
         raw = "//duckduckgo.com/l/?uddg=https%3A%2F%2Fwww.amazon.com%2Fproduct&rut=abc"
         assert _extract_ddg_url(raw) == "https://www.amazon.com/product"
 
+    def test_target_query_string_survives_unwrapping(self):
+        raw = "//duckduckgo.com/l/?uddg=https%3A%2F%2Fshop.com%2Fs%3Fq%3Da%26page%3D2&rut=abc"
+        assert _extract_ddg_url(raw) == "https://shop.com/s?q=a&page=2"
+
+    @pytest.mark.parametrize(
+        "raw",
+        [
+            "//duckduckgo.com/l/?uddg=https%3A%2F%2Fex.com%2Fa%2Bb+c&rut=1",
+            "//duckduckgo.com/l/?rut=1&uddg=https%3A%2F%2Fex.com#frag",
+            "//duckduckgo.com/l/?uddg=&rut=1",
+            "//duckduckgo.com/l/?xuddg=https%3A%2F%2Fex.com",
+        ],
+    )
+    def test_matches_parse_qs(self, raw):
+        values = parse_qs(urlsplit(raw).query).get("uddg")
+        expected = values[0] if values else "https:" + raw
+        assert _extract_ddg_url(raw) == expected
+
     def test_handles_protocol_relative_url(self):
         raw = "//example.com/page"
         assert _extract_ddg_url(raw) == "https://example.com/page"
@@ -57,9 +88,11 @@ class TestExtractDdgUrl:
 class TestExtractSearchResults:
     def test_extracts_results(self):
         html = '''
-        <a class="result__a" href="//duckduckgo.com/l/?uddg=https%3A%2F%2Fwww.amazon.com%2Fp%2F1">Great Product</a>
+        <a class="result__a"
+           href="//duckduckgo.com/l/?uddg=https%3A%2F%2Fwww.amazon.com%2Fp%2F1">Great Product</a>
         <a class="result__snippet" href="#">This is a product snippet with details</a>
-        <a class="result__a" href="//duckduckgo.com/l/?uddg=https%3A%2F%2Fwww.bestbuy.com%2Fp%2F2">Another Product</a>
+        <a class="result__a"
+           href="//duckduckgo.com/l/?uddg=https%3A%2F%2Fwww.bestbuy.com%2Fp%2F2">Another Product</a>
         <a class="result__snippet" href="#">Another snippet here with info</a>
         '''
         results = extract_search_results(html)
@@ -68,8 +101,24 @@ class TestExtractSearchResults:
         assert results[0].title == "Great Product"
         assert "product snippet" in results[0].snippet
 
+    def test_snippet_comes_from_own_result_block(self):
+        html = '''
+        <div class="result results_links"><h2 class="result__title">
+          <a class="result__a" href="https://ad.example.com/p/1">No Snippet</a></h2></div>
+        <div class="result results_links"><h2 class="result__title">
+          <a class="result__a" href="https://shop.example.com/p/2">Second</a></h2>
+          <a class="result__snippet" href="#">Second snippet</a></div>
+        '''
+        results = extract_search_results(html)
+        assert [(r.title, r.snippet) for r in results] == [
+            ("No Snippet", ""),
+            ("Second", "Second snippet"),
+        ]
+
     def test_skips_empty_titles(self):
-        html = '<a class="result__a" href="//duckduckgo.com/l/?uddg=https%3A%2F%2Fexample.com"> </a>'
+        html = (
+            '<a class="result__a" href="//duckduckgo.com/l/?uddg=https%3A%2F%2Fexample.com"> </a>'
+        )
         results = extract_search_results(html)
         assert len(results) == 0
 
@@ -81,100 +130,154 @@ class TestExtractSearchResults:
         results = extract_search_results(html)
         assert len(results) == 1
 
+    def test_deduplicates_url_variants(self):
+        html = (
+            '<a class="result__a" href="https://Shop.example.com/p/1/">A</a>'
+            '<a class="result__a" href="https://shop.example.com/p/1?utm_source=ddg&gclid=x">B</a>'
+            '<a class="result__a" href="https://shop.example.com/p/1#reviews">C</a>'
+            '<a class="result__a" href="https://shop.example.com/p/1?color=red">D</a>'
+        )
+        results = extract_search_results(html)
+        assert [r.title for r in results] == ["A", "D"]
+        # The first variant seen is returned untouched
+        assert results[0].url == "https://Shop.example.com/p/1/"
+
     def test_strips_html_from_title(self):
-        html = '<a class="result__a" href="//duckduckgo.com/l/?uddg=https%3A%2F%2Fex.com">Product <b>Bold</b> Title</a>'
+        html = (
+            '<a class="result__a" href="//duckduckgo.com/l/?uddg=https%3A%2F%2Fex.com">'
+            "Product <b>Bold</b> Title</a>"
+        )
         results = extract_search_results(html)
         assert len(results) == 1
         assert results[0].title == "Product Bold Title"
 
+    def test_decodes_entities_and_ignores_attribute_order(self):
+        html = (
+            '<a href="//duckduckgo.com/l/?uddg=https%3A%2F%2Fex.com&amp;rut=x" class="result__a">'
+            "Tom &amp; Jerry</a>"
+        )
+        results = extract_search_results(html)
+        assert len(results) == 1
+        assert results[0].url == "https://ex.com"
+        assert results[0].title == "Tom & Jerry"
+
+
+def _streaming_client(*outcomes: httpx.Response | Exception) -> MagicMock:
+    """Mock client whose ``stream()`` yields each response (or raises each error) in turn."""
+    pending = iter(outcomes)
+
+    def _stream(*_args, **_kwargs):
+        outcome = next(pending)
+        if isinstance(outcome, Exception):
+            raise outcome
+        ctx = MagicMock()
+        ctx.__aenter__ = AsyncMock(return_value=outcome)
+        ctx.__aexit__ = AsyncMock(return_value=False)
+        return ctx
+
+    mock_client = MagicMock(spec=httpx.AsyncClient)
+    mock_client.stream.side_effect = _stream
+    return mock_client
+
 
 class TestSearchProducts:
-    @pytest.mark.asyncio
     async def test_returns_results_on_success(self):
         html = '''
-        <a class="result__a" href="//duckduckgo.com/l/?uddg=https%3A%2F%2Fshop.example.com%2Fp%2F1">Product Title</a>
+        <a class="result__a"
+           href="//duckduckgo.com/l/?uddg=https%3A%2F%2Fshop.example.com%2Fp%2F1">Product Title</a>
         <a class="result__snippet" href="#">A snippet about the product here</a>
         '''
         mock_response = MagicMock(spec=httpx.Response)
         mock_response.status_code = 200
         mock_response.text = html
 
-        mock_client = AsyncMock(spec=httpx.AsyncClient)
-        mock_client.get.return_value = mock_response
-        mock_client.__aenter__ = AsyncMock(return_value=mock_client)
-        mock_client.__aexit__ = AsyncMock(return_value=False)
+        mock_client = _streaming_client(mock_response)
 
-        with patch("src.mcp_servers.web_search_mcp.search.httpx.AsyncClient", return_value=mock_client):
+        with patch(
+            "src.mcp_servers.web_search_mcp.search.get_shared_client", return_value=mock_client
+        ):
             results = await search_products("test product")
 
         assert len(results) == 1
         assert results[0].title == "Product Title"
 
-    @pytest.mark.asyncio
     async def test_returns_empty_on_http_error(self):
         mock_response = MagicMock(spec=httpx.Response)
         mock_response.status_code = 429
         mock_response.text = ""
 
-        mock_client = AsyncMock(spec=httpx.AsyncClient)
-        mock_client.get.return_value = mock_response
-        mock_client.__aenter__ = AsyncMock(return_value=mock_client)
-        mock_client.__aexit__ = AsyncMock(return_value=False)
+        mock_client = _streaming_client(mock_response)
 
-        with patch("src.mcp_servers.web_search_mcp.search.httpx.AsyncClient", return_value=mock_client):
+        with patch(
+            "src.mcp_servers.web_search_mcp.search.get_shared_client", return_value=mock_client
+        ):
             results = await search_products("test product")
 
         assert results == []
+        mock_response.aread.assert_not_awaited()
 
-    @pytest.mark.asyncio
     async def test_retries_on_network_error(self):
-        html = '<a class="result__a" href="//duckduckgo.com/l/?uddg=https%3A%2F%2Fshop.example.com%2Fp%2F1">Retry Product</a>'
+        html = (
+            '<a class="result__a" '
+            'href="//duckduckgo.com/l/?uddg=https%3A%2F%2Fshop.example.com%2Fp%2F1">'
+            "Retry Product</a>"
+        )
         mock_response = MagicMock(spec=httpx.Response)
         mock_response.status_code = 200
         mock_response.text = html
 
-        mock_client_fail = AsyncMock(spec=httpx.AsyncClient)
-        mock_client_fail.get.side_effect = httpx.ConnectError("connection failed")
-        mock_client_fail.__aenter__ = AsyncMock(return_value=mock_client_fail)
-        mock_client_fail.__aexit__ = AsyncMock(return_value=False)
-
-        mock_client_ok = AsyncMock(spec=httpx.AsyncClient)
-        mock_client_ok.get.return_value = mock_response
-        mock_client_ok.__aenter__ = AsyncMock(return_value=mock_client_ok)
-        mock_client_ok.__aexit__ = AsyncMock(return_value=False)
+        mock_client = _streaming_client(httpx.ConnectError("connection failed"), mock_response)
 
         with patch(
-            "src.mcp_servers.web_search_mcp.search.httpx.AsyncClient",
-            side_effect=[mock_client_fail, mock_client_ok],
+            "src.mcp_servers.web_search_mcp.search.get_shared_client", return_value=mock_client
         ):
             results = await search_products("test product")
 
         assert len(results) == 1
         assert results[0].title == "Retry Product"
 
-    @pytest.mark.asyncio
     async def test_returns_empty_after_all_retries_fail(self):
-        mock_client = AsyncMock(spec=httpx.AsyncClient)
-        mock_client.get.side_effect = httpx.ConnectError("connection failed")
-        mock_client.__aenter__ = AsyncMock(return_value=mock_client)
-        mock_client.__aexit__ = AsyncMock(return_value=False)
+        mock_client = _streaming_client(
+            httpx.ConnectError("connection failed"), httpx.ConnectError("connection failed")
+        )
 
-        with patch("src.mcp_servers.web_search_mcp.search.httpx.AsyncClient", return_value=mock_client):
+        with patch(
+            "src.mcp_servers.web_search_mcp.search.get_shared_client", return_value=mock_client
+        ):
             results = await search_products("test product")
 
         assert results == []
 
-    @pytest.mark.asyncio
     async def test_sets_http_status_on_span(self):
         html = '<a class="result__a" href="//duckduckgo.com/l/?uddg=https%3A%2F%2Fex.com">P</a>'
         mock_response = MagicMock(spec=httpx.Response)
         mock_response.status_code = 200
         mock_response.text = html
 
-        mock_client = AsyncMock(spec=httpx.AsyncClient)
-        mock_client.get.return_value = mock_response
-        mock_client.__aenter__ = AsyncMock(return_value=mock_client)
-        mock_client.__aexit__ = AsyncMock(return_value=False)
+        mock_client = _streaming_client(mock_response)
 
-        with patch("src.mcp_servers.web_search_mcp.search.httpx.AsyncClient", return_value=mock_client):
+        with patch(
+            "src.mcp_servers.web_search_mcp.search.get_shared_client", return_value=mock_client
+        ):
             await search_products("test")
+
+
+class TestCallTool:
+    async def test_search_products_payload(self):
+        results = [SearchResult(url="https://shop.co.il/p/1", title="מיקרוגל", snippet="")]
+        with patch("src.mcp_servers.web_search_mcp.server.search_products", return_value=results):
+            response = await call_tool("search_products", {"query": "microwave"})
+
+        payload = json.loads(response[0].text)
+        assert payload == {
+            "urls": [{"url": "https://shop.co.il/p/1", "title": "מיקרוגל", "snippet": ""}],
+            "status": "ok",
+        }
+
+    async def test_identify_ecommerce_sites_payload(self):
+        urls = [{"url": "https://www.amazon.com/dp/B1"}, {"url": "https://www.youtube.com/watch"}]
+        response = await call_tool("identify_ecommerce_sites", {"urls": urls})
+
+        payload = json.loads(response[0].text)
+        assert payload["status"] == "ok"
+        assert [u["domain"] for u in payload["ecommerce_urls"]] == ["amazon.com"]
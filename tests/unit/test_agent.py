@@ -2,174 +2,167 @@
 
 from __future__ import annotations
 
-from unittest.mock import AsyncMock, patch
+from types import SimpleNamespace
+from unittest.mock import DEFAULT, patch
 
 import pytest
 
 from src.agents.main_agent import AgentState, MainAgent
 from src.mcp_servers.web_search_mcp.ecommerce_detector import EcommerceSignal
 from src.mcp_servers.web_search_mcp.search import SearchResult
-from src.shared.models import ProductResult, SearchStatus, Seller
-
-
-def test_agent_state_defaults():
-    state = AgentState(session_id="test-123")
-    assert state.status == SearchStatus.PENDING
-    assert state.results == []
-    assert state.conversation_history == []
-
-
-@pytest.mark.asyncio
-async def test_main_agent_successful_pipeline():
-    mock_browser = AsyncMock()
-
-    mock_search_results = [
-        SearchResult(url="https://www.amazon.com/dp/B123", title="Product A", snippet="Buy it"),
-        SearchResult(url="https://www.youtube.com/watch", title="Review", snippet=""),
-    ]
-
-    mock_products = [
-        ProductResult(
-            name="Test Product",
-            model_id="TP-001",
-            brand="TestBrand",
-            sellers=[Seller(name="amazon.com", price=29.99, currency="USD")],
-        ),
-    ]
-
-    with (
-        patch("src.agents.main_agent.get_browser") as mock_get_browser,
-        patch("src.agents.main_agent.search_products", return_value=mock_search_results) as mock_search,
-        patch("src.agents.main_agent.scrape_page", return_value=mock_products) as mock_scrape,
-    ):
-        mock_ctx = AsyncMock()
-        mock_ctx.__aenter__ = AsyncMock(return_value=mock_browser)
-        mock_ctx.__aexit__ = AsyncMock(return_value=False)
-        mock_get_browser.return_value = mock_ctx
-
-        agent = MainAgent(session_id="test-pipeline")
-        state = await agent.process_query("wireless headphones", language="en", market="us")
+from src.shared.models import ProductResult, SearchStatus, Seller, StatusCode
+
+# Shared, read-only test data: built (and validated) once at import.
+# SearchResult is a frozen dataclass and the agent never mutates products.
+_AMAZON = SearchResult(url="https://www.amazon.com/dp/B1", title="Product A", snippet="")
+_EBAY = SearchResult(url="https://www.ebay.com/itm/2", title="Product B", snippet="")
+_YOUTUBE = SearchResult(url="https://www.youtube.com/watch?v=1", title="Review", snippet="")
+_REDDIT = SearchResult(url="https://www.reddit.com/r/gadgets", title="Discussion", snippet="")
+
+_AMAZON_PRODUCT = ProductResult(
+    name="Test Product",
+    model_id="TP-001",
+    brand="TestBrand",
+    sellers=[Seller(name="amazon.com", price=29.99, currency="USD")],
+)
+_EBAY_PRODUCT = ProductResult(name="Ebay Product", sellers=[Seller(name="ebay.com", price=19.99)])
+
+
+class _Ctx:
+    """Minimal stand-in for ``get_browser()``'s async context manager."""
+
+    def __init__(self, browser=None, exc=None):
+        self.browser = browser if browser is not None else object()
+        self.exc = exc
+
+    async def __aenter__(self):
+        if self.exc:
+            raise self.exc
+        return self.browser
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+@pytest.fixture
+def agent_mocks():
+    """Patch the agent's search, scrape and browser dependencies in one place.
+
+    ``get_browser()`` returns a ``_Ctx``; tests configure ``search_products`` /
+    ``scrape_page`` via ``return_value`` or ``side_effect``.
+    """
+    with patch.multiple(
+        "src.agents.main_agent",
+        get_browser=DEFAULT,
+        search_products=DEFAULT,
+        scrape_page=DEFAULT,
+    ) as mocks:
+        mocks["get_browser"].return_value = _Ctx()
+        mocks["search_products"].return_value = []
+        mocks["scrape_page"].return_value = []
+        yield SimpleNamespace(**mocks)
+
+
+@pytest.fixture(scope="module")
+def default_state() -> AgentState:
+    return AgentState(session_id="test-123")
+
+
+@pytest.mark.parametrize(
+    ("attr", "expected"),
+    [
+        ("status", SearchStatus.PENDING),
+        ("results", []),
+        ("conversation_history", []),
+        ("status_messages", []),
+        ("status_codes", set()),
+    ],
+)
+def test_agent_state_defaults(default_state, attr, expected):
+    assert getattr(default_state, attr) == expected
+
+
+async def test_main_agent_successful_pipeline(agent_mocks):
+    agent_mocks.search_products.return_value = [_AMAZON, _YOUTUBE]
+    agent_mocks.scrape_page.return_value = [_AMAZON_PRODUCT]
+
+    agent = MainAgent(session_id="test-pipeline")
+    state = await agent.process_query("wireless headphones", language="en", market="us")
 
     assert state.status == SearchStatus.COMPLETED
     assert state.query == "wireless headphones"
     assert len(state.results) == 1
     assert state.results[0].name == "Test Product"
-    mock_search.assert_awaited_once()
-    mock_scrape.assert_awaited_once()
-
-
-@pytest.mark.asyncio
-async def test_main_agent_no_search_results():
-    with patch("src.agents.main_agent.search_products", return_value=[]):
-        agent = MainAgent(session_id="test-empty")
-        state = await agent.process_query("nonexistent product xyz")
-
-    assert state.status == SearchStatus.COMPLETED
-    assert state.results == []
-    assert any("No search results" in m for m in state.status_messages)
+    agent_mocks.search_products.assert_awaited_once()
+    agent_mocks.scrape_page.assert_awaited_once()
 
 
-@pytest.mark.asyncio
-async def test_main_agent_no_ecommerce_sites():
-    # Return results but none are e-commerce
-    mock_search_results = [
-        SearchResult(url="https://www.youtube.com/watch?v=1", title="Review", snippet=""),
-        SearchResult(url="https://www.reddit.com/r/gadgets", title="Discussion", snippet=""),
-    ]
+@pytest.mark.parametrize(
+    ("search_results", "expected_code"),
+    [
+        pytest.param([], StatusCode.NO_SEARCH_RESULTS, id="no_search_results"),
+        pytest.param([_YOUTUBE, _REDDIT], StatusCode.NO_ECOMMERCE_SITES, id="no_ecommerce_sites"),
+    ],
+)
+async def test_main_agent_early_exit(agent_mocks, search_results, expected_code):
+    agent_mocks.search_products.return_value = search_results
 
-    with patch("src.agents.main_agent.search_products", return_value=mock_search_results):
-        agent = MainAgent(session_id="test-no-ecom")
-        state = await agent.process_query("product review video")
+    agent = MainAgent(session_id="test-early-exit")
+    state = await agent.process_query("product review video")
 
     assert state.status == SearchStatus.COMPLETED
     assert state.results == []
-    assert any("No e-commerce" in m for m in state.status_messages)
-
+    assert state.status_codes == {expected_code}
+    agent_mocks.scrape_page.assert_not_awaited()
 
-@pytest.mark.asyncio
-async def test_main_agent_browser_error():
-    mock_search_results = [
-        SearchResult(url="https://www.amazon.com/dp/B1", title="Product A", snippet=""),
-    ]
 
-    with (
-        patch("src.agents.main_agent.search_products", return_value=mock_search_results),
-        patch("src.agents.main_agent.get_browser") as mock_get_browser,
-    ):
-        mock_ctx = AsyncMock()
-        mock_ctx.__aenter__ = AsyncMock(side_effect=RuntimeError("Browser launch failed"))
-        mock_ctx.__aexit__ = AsyncMock(return_value=False)
-        mock_get_browser.return_value = mock_ctx
+async def test_main_agent_browser_error(agent_mocks):
+    agent_mocks.search_products.return_value = [_AMAZON]
+    agent_mocks.get_browser.return_value = _Ctx(exc=RuntimeError("Browser launch failed"))
 
-        agent = MainAgent(session_id="test-error")
-        state = await agent.process_query("test query")
+    agent = MainAgent(session_id="test-error")
+    state = await agent.process_query("test query")
 
     assert state.status == SearchStatus.FAILED
-    assert any("failed" in m.lower() for m in state.status_messages)
+    assert StatusCode.SEARCH_FAILED in state.status_codes
 
 
-@pytest.mark.asyncio
-async def test_main_agent_scrape_site_error_continues():
+async def test_main_agent_scrape_site_error_continues(agent_mocks):
     """One site failure should not crash the pipeline."""
-    mock_browser = AsyncMock()
-
-    mock_search_results = [
-        SearchResult(url="https://www.amazon.com/dp/B1", title="Product A", snippet=""),
-        SearchResult(url="https://www.ebay.com/itm/2", title="Product B", snippet=""),
-    ]
-
-    mock_products = [
-        ProductResult(name="Ebay Product", sellers=[Seller(name="ebay.com", price=19.99)]),
-    ]
-
-    call_count = 0
+    agent_mocks.search_products.return_value = [_AMAZON, _EBAY]
 
     async def mock_scrape(browser, url, query):
-        nonlocal call_count
-        call_count += 1
         if "amazon.com" in url:
             raise RuntimeError("Amazon blocked us")
-        return mock_products
+        return [_EBAY_PRODUCT]
 
-    with (
-        patch("src.agents.main_agent.get_browser") as mock_get_browser,
-        patch("src.agents.main_agent.search_products", return_value=mock_search_results),
-        patch("src.agents.main_agent.scrape_page", side_effect=mock_scrape),
-    ):
-        mock_ctx = AsyncMock()
-        mock_ctx.__aenter__ = AsyncMock(return_value=mock_browser)
-        mock_ctx.__aexit__ = AsyncMock(return_value=False)
-        mock_get_browser.return_value = mock_ctx
+    agent_mocks.scrape_page.side_effect = mock_scrape
 
-        agent = MainAgent(session_id="test-partial")
-        state = await agent.process_query("laptop")
+    agent = MainAgent(session_id="test-partial")
+    state = await agent.process_query("laptop")
 
     assert state.status == SearchStatus.COMPLETED
     assert len(state.results) == 1
     assert state.results[0].name == "Ebay Product"
 
 
-@pytest.mark.asyncio
-async def test_main_agent_status_callback():
+async def test_main_agent_status_callback(agent_mocks):
     received: list[tuple[str, str]] = []
 
     async def callback(session_id: str, message: str) -> None:
         received.append((session_id, message))
 
-    with patch("src.agents.main_agent.search_products", return_value=[]):
-        agent = MainAgent(session_id="cb-test", status_callback=callback)
-        await agent.process_query("test query")
+    agent = MainAgent(session_id="cb-test", status_callback=callback)
+    await agent.process_query("test query")
 
     assert len(received) >= 2
     assert received[0][0] == "cb-test"
     assert received[0][1] == "Started search..."
 
 
-@pytest.mark.asyncio
-async def test_main_agent_refine_search():
-    with patch("src.agents.main_agent.search_products", return_value=[]):
-        agent = MainAgent(session_id="test-123")
-        await agent.process_query("refrigerator")
+async def test_main_agent_refine_search(agent_mocks):
+    agent = MainAgent(session_id="test-123")
+    await agent.process_query("refrigerator")
 
     state = await agent.refine_search("only black models")
     assert len(state.conversation_history) == 1
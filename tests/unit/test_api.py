@@ -12,22 +12,26 @@ from src.backend.main import app
 from src.shared.config import settings
 from src.shared.models import ProductResult, SearchStatus, Seller
 
+# One transport and client for the whole module; the tests share the
+# session event loop the fixture runs on, and patches stay per test.
+# The xdist group keeps the module on one worker under --dist=loadgroup,
+# so the client is built once instead of once per worker.
+pytestmark = [pytest.mark.asyncio(loop_scope="session"), pytest.mark.xdist_group("api")]
 
-@pytest.fixture
+
+@pytest.fixture(scope="module")
 async def client():
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
         yield ac
 
 
-@pytest.mark.asyncio
 async def test_health_check(client: AsyncClient):
     response = await client.get("/api/health")
     assert response.status_code == 200
     assert response.json() == {"status": "ok"}
 
 
-@pytest.mark.asyncio
 async def test_search_endpoint(client: AsyncClient):
     mock_state = AgentState(session_id="mock-session")
     mock_state.status = SearchStatus.COMPLETED
@@ -54,7 +58,6 @@ async def test_search_endpoint(client: AsyncClient):
     assert data["results"][0]["name"] == "Test Product"
 
 
-@pytest.mark.asyncio
 async def test_search_passes_market(client: AsyncClient):
     mock_state = AgentState(session_id="mock-session")
     mock_state.status = SearchStatus.COMPLETED
@@ -76,7 +79,6 @@ async def test_search_passes_market(client: AsyncClient):
     )
 
 
-@pytest.mark.asyncio
 async def test_search_auto_detects_market(client: AsyncClient):
     mock_state = AgentState(session_id="mock-session")
     mock_state.status = SearchStatus.COMPLETED
@@ -102,7 +104,6 @@ async def test_search_auto_detects_market(client: AsyncClient):
     )
 
 
-@pytest.mark.asyncio
 async def test_search_generates_session_id(client: AsyncClient):
     mock_state = AgentState(session_id="will-be-replaced")
     mock_state.status = SearchStatus.COMPLETED
@@ -122,7 +123,6 @@ async def test_search_generates_session_id(client: AsyncClient):
     assert len(data["session_id"]) == 32  # uuid4().hex length
 
 
-@pytest.mark.asyncio
 async def test_search_uses_provided_session_id(client: AsyncClient):
     mock_state = AgentState(session_id="my-session-123")
     mock_state.status = SearchStatus.COMPLETED
@@ -142,7 +142,6 @@ async def test_search_uses_provided_session_id(client: AsyncClient):
     assert data["session_id"] == "my-session-123"
 
 
-@pytest.mark.asyncio
 async def test_shopping_list_endpoint(client: AsyncClient):
     response = await client.get("/api/shopping-list")
     assert response.status_code == 200
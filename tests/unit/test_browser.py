@@ -2,56 +2,94 @@
 
 from __future__ import annotations
 
-from unittest.mock import AsyncMock, MagicMock, patch
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
 
 import pytest
+from playwright.async_api import (
+    Browser,
+    BrowserContext,
+    BrowserType,
+    Page,
+    Playwright,
+    PlaywrightContextManager,
+)
 
-from src.shared.browser import get_browser, get_page
+from src.shared.browser import get_browser, get_page, shutdown_browser
 
 
-@pytest.mark.asyncio
-async def test_get_browser_lifecycle():
-    mock_browser = AsyncMock()
-    mock_pw = AsyncMock()
-    mock_pw.chromium.launch.return_value = mock_browser
+@pytest.fixture(autouse=True)
+async def _reset_shared_browser():
+    yield
+    await shutdown_browser()
 
-    mock_pw_ctx = AsyncMock()
-    mock_pw_ctx.start.return_value = mock_pw
 
-    with patch("src.shared.browser.async_playwright", return_value=mock_pw_ctx):
-        async with get_browser() as browser:
-            assert browser is mock_browser
+def _mock_browser() -> MagicMock:
+    # spec= keeps the mocks to Playwright's real surface: coroutine methods
+    # become AsyncMocks, is_connected() stays synchronous
+    browser = MagicMock(spec=Browser)
+    browser.is_connected.return_value = True
+    return browser
 
-        mock_pw.chromium.launch.assert_called_once()
-        mock_browser.close.assert_awaited_once()
-        mock_pw.stop.assert_awaited_once()
 
+@pytest.fixture
+def playwright_mocks():
+    """Patch async_playwright() with a spec'd Playwright -> Chromium -> Browser chain."""
+    browser = _mock_browser()
+    pw = MagicMock(spec=Playwright)
+    pw.chromium = MagicMock(spec=BrowserType)
+    pw.chromium.launch.return_value = browser
+    pw_ctx = MagicMock(spec=PlaywrightContextManager)
+    pw_ctx.start.return_value = pw
+    with patch("src.shared.browser.async_playwright", return_value=pw_ctx):
+        yield SimpleNamespace(pw_ctx=pw_ctx, pw=pw, browser=browser)
 
-@pytest.mark.asyncio
-async def test_get_browser_launches_headless():
-    mock_browser = AsyncMock()
-    mock_pw = AsyncMock()
-    mock_pw.chromium.launch.return_value = mock_browser
 
-    mock_pw_ctx = AsyncMock()
-    mock_pw_ctx.start.return_value = mock_pw
+async def test_get_browser_lifecycle(playwright_mocks):
+    async with get_browser() as browser:
+        assert browser is playwright_mocks.browser
+    async with get_browser() as browser:
+        assert browser is playwright_mocks.browser
 
-    with patch("src.shared.browser.async_playwright", return_value=mock_pw_ctx):
-        async with get_browser() as _browser:
-            pass
+    playwright_mocks.pw.chromium.launch.assert_called_once()
+    playwright_mocks.browser.close.assert_not_awaited()
 
-        call_kwargs = mock_pw.chromium.launch.call_args
-        assert call_kwargs.kwargs["headless"] is True
-        assert "--no-sandbox" in call_kwargs.kwargs["args"]
+    await shutdown_browser()
+    playwright_mocks.browser.close.assert_awaited_once()
+    playwright_mocks.pw.stop.assert_awaited_once()
 
 
-@pytest.mark.asyncio
-async def test_get_page_lifecycle():
-    mock_page = AsyncMock()
-    mock_context = AsyncMock()
+async def test_get_browser_relaunches_after_disconnect(playwright_mocks):
+    async with get_browser():
+        pass
+    playwright_mocks.browser.is_connected.return_value = False
+    async with get_browser():
+        pass
+
+    assert playwright_mocks.pw.chromium.launch.call_count == 2
+    playwright_mocks.pw_ctx.start.assert_awaited_once()
+
+
+async def test_get_browser_launches_headless(playwright_mocks):
+    async with get_browser():
+        pass
+
+    call_kwargs = playwright_mocks.pw.chromium.launch.call_args
+    assert call_kwargs.kwargs["headless"] is True
+    assert "--no-sandbox" in call_kwargs.kwargs["args"]
+
+
+def _mock_browser_with_context() -> tuple[MagicMock, MagicMock, MagicMock]:
+    mock_page = MagicMock(spec=Page)
+    mock_context = MagicMock(spec=BrowserContext)
     mock_context.new_page.return_value = mock_page
-    mock_browser = AsyncMock()
+    mock_browser = _mock_browser()
     mock_browser.new_context.return_value = mock_context
+    return mock_browser, mock_context, mock_page
+
+
+async def test_get_page_lifecycle():
+    mock_browser, mock_context, mock_page = _mock_browser_with_context()
 
     async with get_page(mock_browser) as page:
         assert page is mock_page
@@ -59,16 +97,22 @@ async def test_get_page_lifecycle():
     mock_browser.new_context.assert_called_once()
     mock_context.add_init_script.assert_awaited_once()
     mock_page.close.assert_awaited_once()
+    # Contexts are never reused, so nothing leaks into the next scrape
+    mock_context.close.assert_awaited_once()
+
+
+async def test_get_page_closes_context_after_error():
+    mock_browser, mock_context, _mock_page = _mock_browser_with_context()
+
+    with pytest.raises(RuntimeError):
+        async with get_page(mock_browser):
+            raise RuntimeError("page crashed")
+
     mock_context.close.assert_awaited_once()
 
 
-@pytest.mark.asyncio
 async def test_get_page_uses_default_user_agent():
-    mock_page = AsyncMock()
-    mock_context = AsyncMock()
-    mock_context.new_page.return_value = mock_page
-    mock_browser = AsyncMock()
-    mock_browser.new_context.return_value = mock_context
+    mock_browser, _mock_context, _mock_page = _mock_browser_with_context()
 
     async with get_page(mock_browser, locale="he-IL") as _page:
         pass
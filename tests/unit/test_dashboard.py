@@ -4,49 +4,43 @@ from __future__ import annotations
 
 import sys
 from pathlib import Path
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock
 
 import pytest
 
 
-def test_dashboard_main_missing_phoenix():
+def test_dashboard_main_missing_phoenix(monkeypatch: pytest.MonkeyPatch):
     """When arize-phoenix is not installed, exit with a helpful message."""
     from src.dashboard.server import main
 
-    # Simulate ImportError for phoenix
-    with patch.dict(sys.modules, {"phoenix": None}):
-        with pytest.raises(SystemExit) as exc_info:
-            main(["--port", "9999"])
-        assert exc_info.value.code == 1
+    # A None entry makes `import phoenix` raise ImportError
+    monkeypatch.setitem(sys.modules, "phoenix", None)
+    with pytest.raises(SystemExit) as exc_info:
+        main(["--port", "9999"])
+    assert exc_info.value.code == 1
 
 
-def test_dashboard_creates_storage_dir(tmp_path: Path):
+def test_dashboard_creates_storage_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
     """Storage directory should be created when it doesn't exist."""
-    from src.dashboard.server import main
+    import src.dashboard.server as srv
 
     storage = tmp_path / "nested" / "phoenix_store"
     assert not storage.exists()
 
+    # main() imports phoenix lazily, so a sys.modules entry is enough; no reload
     mock_px = MagicMock()
+    monkeypatch.setitem(sys.modules, "phoenix", mock_px)
+    # Make wait() return immediately so the test doesn't block, and keep
+    # the real SIGINT/SIGTERM handlers untouched
     mock_event = MagicMock()
-    # Make wait() return immediately so the test doesn't block
-    mock_event.wait.return_value = None
-    mock_event.set.return_value = None
-
-    with (
-        patch.dict(sys.modules, {"phoenix": mock_px}),
-        patch("src.dashboard.server.px", mock_px, create=True),
-        patch("src.dashboard.server.threading.Event", return_value=mock_event),
-    ):
-        # We need to re-import to pick up the patched module
-        import importlib
-
-        import src.dashboard.server as srv
-
-        importlib.reload(srv)
-        try:
-            srv.main(["--port", "7777", "--storage-dir", str(storage)])
-        except (SystemExit, KeyboardInterrupt):
-            pass
+    monkeypatch.setattr(srv.threading, "Event", MagicMock(return_value=mock_event))
+    monkeypatch.setattr(srv.signal, "signal", MagicMock())
+    # main() exports these; registering them here restores them afterwards
+    monkeypatch.setenv("PHOENIX_WORKING_DIR", str(tmp_path))
+    monkeypatch.setenv("PHOENIX_PORT", "6006")
+
+    srv.main(["--port", "7777", "--storage-dir", str(storage)])
 
     assert storage.exists()
+    mock_px.launch_app.assert_called_once_with()
+    mock_event.wait.assert_called_once_with()
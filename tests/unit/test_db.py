@@ -2,14 +2,12 @@
 
 from __future__ import annotations
 
-import pytest
 from sqlalchemy import select, text
 
 from src.backend.db.engine import async_session, init_db
 from src.backend.db.models import SearchHistory
 
 
-@pytest.mark.asyncio
 async def test_init_db_creates_tables():
     await init_db()
     # Verify the table exists by querying it without error
@@ -20,19 +18,18 @@ async def test_init_db_creates_tables():
         assert result.scalar_one() == "search_history"
 
 
-@pytest.mark.asyncio
 async def test_insert_search_history():
-    await init_db()
-    async with async_session() as session:
-        record = SearchHistory(
-            session_id="db-test-1",
-            query="test product",
-            status="completed",
-            results_json="[]",
-            language="en",
+    # Tables come from the session-wide _create_tables fixture in conftest
+    async with async_session.begin() as session:
+        session.add(
+            SearchHistory(
+                session_id="db-test-1",
+                query="test product",
+                status="completed",
+                results_json="[]",
+                language="en",
+            )
         )
-        session.add(record)
-        await session.commit()
 
     async with async_session() as session:
         result = await session.execute(
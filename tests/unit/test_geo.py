@@ -2,88 +2,107 @@
 
 from __future__ import annotations
 
+import sys
 from types import SimpleNamespace
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock
 
 import pytest
 
+from src.shared import geo
 from src.shared.config import settings
 from src.shared.geo import detect_market, get_client_ip
 
 
-class TestDetectMarket:
-    def test_returns_country_code_from_geoip(self):
-        mock_reader_instance = MagicMock()
-        mock_response = MagicMock()
-        mock_response.country.iso_code = "IL"
-        mock_reader_instance.country.return_value = mock_response
-        mock_reader_instance.__enter__ = MagicMock(return_value=mock_reader_instance)
-        mock_reader_instance.__exit__ = MagicMock(return_value=False)
+@pytest.fixture(autouse=True)
+def _reset_geo_reader():
+    geo._reset_reader()
+    geo._lookup_country.cache_clear()
+    yield
+    geo._reset_reader()
+    geo._lookup_country.cache_clear()
+
 
-        mock_geoip2 = MagicMock()
-        mock_geoip2.database.Reader.return_value = mock_reader_instance
+@pytest.fixture
+def geoip_reader(monkeypatch: pytest.MonkeyPatch) -> MagicMock:
+    """Install a fake ``geoip2`` package and return the reader it opens."""
+    mock_geoip2 = MagicMock()
+    monkeypatch.setitem(sys.modules, "geoip2", mock_geoip2)
+    monkeypatch.setitem(sys.modules, "geoip2.database", mock_geoip2.database)
+    reader = mock_geoip2.database.Reader.return_value
+    reader.country.return_value.country.iso_code = "IL"
+    return reader
 
-        with patch.dict("sys.modules", {"geoip2": mock_geoip2, "geoip2.database": mock_geoip2.database}):
-            result = detect_market("1.2.3.4")
 
-        assert result == "il"
+class TestDetectMarket:
+    @pytest.mark.parametrize(
+        ("open_error", "lookup_error", "iso_code", "expected"),
+        [
+            pytest.param(None, None, "IL", "il", id="country_code"),
+            pytest.param(FileNotFoundError, None, "IL", settings.default_market, id="db_not_found"),
+            pytest.param(
+                None, ValueError("invalid IP"), "IL", settings.default_market, id="lookup_error"
+            ),
+            pytest.param(None, None, None, settings.default_market, id="no_country"),
+        ],
+    )
+    def test_detect_market(self, geoip_reader, open_error, lookup_error, iso_code, expected):
+        sys.modules["geoip2.database"].Reader.side_effect = open_error
+        geoip_reader.country.side_effect = lookup_error
+        geoip_reader.country.return_value.country.iso_code = iso_code
+
+        assert detect_market("1.2.3.4") == expected
 
-    def test_falls_back_when_db_not_found(self):
-        mock_geoip2 = MagicMock()
-        mock_reader_instance = MagicMock()
-        mock_reader_instance.__enter__ = MagicMock(side_effect=FileNotFoundError)
-        mock_geoip2.database.Reader.return_value = mock_reader_instance
+    def test_falls_back_when_geoip2_not_installed(self, monkeypatch: pytest.MonkeyPatch):
+        # None entries make `import geoip2.database` raise ImportError
+        monkeypatch.setitem(sys.modules, "geoip2", None)
+        monkeypatch.setitem(sys.modules, "geoip2.database", None)
 
-        with patch.dict("sys.modules", {"geoip2": mock_geoip2, "geoip2.database": mock_geoip2.database}):
-            result = detect_market("1.2.3.4")
+        assert detect_market("1.2.3.4") == settings.default_market
 
-        assert result == settings.default_market
+    def test_opens_database_once(self, geoip_reader):
+        geoip_reader.country.return_value.country.iso_code = "US"
 
-    def test_falls_back_when_geoip2_not_installed(self):
-        with patch.dict("sys.modules", {"geoip2": None}):
-            # Force re-import failure
-            with patch("builtins.__import__", side_effect=ImportError):
-                result = detect_market("1.2.3.4")
+        assert detect_market("1.2.3.4") == "us"
+        assert detect_market("5.6.7.8") == "us"
 
-        assert result == settings.default_market
+        sys.modules["geoip2.database"].Reader.assert_called_once_with(settings.geoip_db_path)
+        assert geoip_reader.country.call_count == 2
 
-    def test_falls_back_on_lookup_error(self):
-        mock_reader_instance = MagicMock()
-        mock_reader_instance.__enter__ = MagicMock(return_value=mock_reader_instance)
-        mock_reader_instance.__exit__ = MagicMock(return_value=False)
-        mock_reader_instance.country.side_effect = ValueError("invalid IP")
+    def test_caches_lookup_per_ip(self, geoip_reader):
+        assert detect_market("1.2.3.4") == "il"
+        assert detect_market("1.2.3.4") == "il"
 
-        mock_geoip2 = MagicMock()
-        mock_geoip2.database.Reader.return_value = mock_reader_instance
+        geoip_reader.country.assert_called_once_with("1.2.3.4")
 
-        with patch.dict("sys.modules", {"geoip2": mock_geoip2, "geoip2.database": mock_geoip2.database}):
-            result = detect_market("bad-ip")
+    def test_does_not_cache_fallback(self, geoip_reader):
+        resolved = geoip_reader.country.return_value
+        geoip_reader.country.side_effect = [ValueError("transient"), resolved]
 
-        assert result == settings.default_market
+        assert detect_market("1.2.3.4") == settings.default_market
+        assert detect_market("1.2.3.4") == "il"
 
 
 class TestGetClientIp:
-    def test_extracts_from_x_forwarded_for(self):
-        request = SimpleNamespace(
-            headers={"x-forwarded-for": "203.0.113.50, 70.41.3.18"},
-            client=SimpleNamespace(host="10.0.0.1"),
-        )
-        assert get_client_ip(request) == "203.0.113.50"
-
-    def test_single_x_forwarded_for(self):
-        request = SimpleNamespace(
-            headers={"x-forwarded-for": "203.0.113.50"},
-            client=SimpleNamespace(host="10.0.0.1"),
-        )
-        assert get_client_ip(request) == "203.0.113.50"
-
-    def test_falls_back_to_client_host(self):
-        request = SimpleNamespace(
-            headers={},
-            client=SimpleNamespace(host="192.168.1.1"),
-        )
-        assert get_client_ip(request) == "192.168.1.1"
-
-    def test_falls_back_to_localhost_when_no_client(self):
-        request = SimpleNamespace(headers={})
-        assert get_client_ip(request) == "127.0.0.1"
+    @pytest.mark.parametrize(
+        ("headers", "client_host", "expected"),
+        [
+            pytest.param(
+                {"x-forwarded-for": "203.0.113.50, 70.41.3.18"},
+                "10.0.0.1",
+                "203.0.113.50",
+                id="x_forwarded_for_chain",
+            ),
+            pytest.param(
+                {"x-forwarded-for": "203.0.113.50"},
+                "10.0.0.1",
+                "203.0.113.50",
+                id="x_forwarded_for",
+            ),
+            pytest.param({}, "192.168.1.1", "192.168.1.1", id="client_host"),
+            pytest.param({}, None, "127.0.0.1", id="no_client"),
+        ],
+    )
+    def test_get_client_ip(self, headers, client_host, expected):
+        client = SimpleNamespace(host=client_host) if client_host else None
+        request = SimpleNamespace(headers=headers, client=client)
+        assert get_client_ip(request) == expected
@@ -0,0 +1,37 @@
+"""Unit tests for the shared httpx client."""
+
+from __future__ import annotations
+
+import pytest
+
+from src.shared.http_client import (
+    CONNECT_TIMEOUT,
+    REQUEST_TIMEOUT,
+    close_shared_client,
+    get_shared_client,
+)
+
+
+@pytest.fixture(autouse=True)
+async def _close_client():
+    yield
+    await close_shared_client()
+
+
+async def test_client_is_reused_until_closed():
+    client = get_shared_client()
+    assert get_shared_client() is client
+
+    await close_shared_client()
+    assert client.is_closed
+
+    replacement = get_shared_client()
+    assert replacement is not client
+
+
+async def test_client_uses_documented_timeouts():
+    client = get_shared_client()
+
+    assert client.timeout.read == REQUEST_TIMEOUT
+    assert client.timeout.connect == CONNECT_TIMEOUT
+    assert client.follow_redirects
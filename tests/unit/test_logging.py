@@ -4,24 +4,81 @@ from __future__ import annotations
 
 import json
 import logging
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock, patch
 
+import pydantic
 import pytest
+from opentelemetry import trace
+from opentelemetry.sdk.trace import SpanProcessor, TracerProvider
+from opentelemetry.sdk.trace.export import ConsoleSpanExporter, SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+import src.shared.logging as log_mod
+from src.shared import config
+from src.shared.config import settings
+from src.shared.logging import (
+    ConsoleFormatter,
+    JsonFormatter,
+    SessionFilter,
+    get_logger,
+    get_session_id,
+    get_tracer,
+    set_session_id,
+    setup_logging,
+    shutdown_tracing,
+)
+
+_REPO_ROOT = Path(__file__).resolve().parents[2]
+
+# The filter and formatters keep no state of their own (the filter reads the
+# contextvar), so one instance of each serves every test.
+_FILT = SessionFilter()
+_JSON = JsonFormatter()
+_CONSOLE = ConsoleFormatter()
+
+
+def _record(
+    name: str = "test",
+    level: int = logging.INFO,
+    msg: str = "m",
+    args: tuple = (),
+    exc_info=None,
+    **extra,
+) -> logging.LogRecord:
+    """Build a synthetic LogRecord from attributes, as logging.makeLogRecord does."""
+    return logging.makeLogRecord(
+        {
+            "name": name,
+            "levelno": level,
+            "levelname": logging.getLevelName(level),
+            "msg": msg,
+            "args": args,
+            "exc_info": exc_info,
+            **extra,
+        }
+    )
+
 
 # Reset module-level initialisation flags before each test so that
 # setup_logging / _init_tracer_provider can be re-exercised.
 
 
 @pytest.fixture(autouse=True)
-def _reset_logging_state():
+def _reset_flags():
     """Reset the shared logging module's initialisation flags."""
-    import src.shared.logging as log_mod
-
     log_mod._initialized = False
     log_mod._tracer_initialized = False
     # Clear any session ID left over from a previous test
     log_mod._session_id_var.set("")
+
+
+@pytest.fixture
+def _reset_handlers():
+    """Restore the root logger after a test that runs setup_logging()."""
     yield
-    # Restore root logger to avoid polluting other tests
     root = logging.getLogger()
     root.handlers.clear()
     root.setLevel(logging.WARNING)
@@ -33,16 +90,13 @@ def _reset_logging_state():
 
 
 def test_get_logger_returns_logger():
-    from src.shared.logging import get_logger
-
     logger = get_logger("test")
     assert isinstance(logger, logging.Logger)
     assert logger.name == "test"
 
 
+@pytest.mark.usefixtures("_reset_handlers")
 def test_setup_logging_idempotent():
-    from src.shared.logging import setup_logging
-
     setup_logging()
     handler_count = len(logging.getLogger().handlers)
 
@@ -56,15 +110,11 @@ def test_setup_logging_idempotent():
 
 
 def test_session_id_context():
-    from src.shared.logging import get_session_id, set_session_id
-
     set_session_id("abc")
     assert get_session_id() == "abc"
 
 
 def test_session_id_default():
-    from src.shared.logging import get_session_id
-
     assert get_session_id() == ""
 
 
@@ -74,15 +124,9 @@ def test_session_id_default():
 
 
 def test_session_filter_injects_id():
-    from src.shared.logging import SessionFilter, set_session_id
-
     set_session_id("sess-42")
-    filt = SessionFilter()
-    record = logging.LogRecord(
-        name="test", level=logging.INFO, pathname="", lineno=0,
-        msg="hello", args=(), exc_info=None,
-    )
-    result = filt.filter(record)
+    record = _record(msg="hello")
+    result = _FILT.filter(record)
     assert result is True
     assert record.session_id == "sess-42"  # type: ignore[attr-defined]
 
@@ -93,17 +137,10 @@ def test_session_filter_injects_id():
 
 
 def test_json_formatter_output():
-    from src.shared.logging import JsonFormatter, SessionFilter, set_session_id
-
     set_session_id("json-test")
-    formatter = JsonFormatter()
-    filt = SessionFilter()
-    record = logging.LogRecord(
-        name="mylogger", level=logging.INFO, pathname="", lineno=0,
-        msg="test message", args=(), exc_info=None,
-    )
-    filt.filter(record)
-    output = formatter.format(record)
+    record = _record("mylogger", msg="test message")
+    _FILT.filter(record)
+    output = _JSON.format(record)
     data = json.loads(output)
     assert data["level"] == "INFO"
     assert data["logger"] == "mylogger"
@@ -113,24 +150,22 @@ def test_json_formatter_output():
     assert "exception" not in data
 
 
-def test_json_formatter_with_exception():
-    from src.shared.logging import JsonFormatter, SessionFilter
+def test_json_formatter_uses_record_time_and_args():
+    record = _record("mylogger", msg="found %d results", args=(3,), created=1700000000.25)
+    data = json.loads(_JSON.format(record))
+    assert data["message"] == "found 3 results"
+    assert data["timestamp"] == "2023-11-14T22:13:20.250000Z"
+
 
-    formatter = JsonFormatter()
-    filt = SessionFilter()
+def test_json_formatter_with_exception():
     try:
         raise ValueError("boom")
     except ValueError:
-        import sys
-
         exc_info = sys.exc_info()
 
-    record = logging.LogRecord(
-        name="exc", level=logging.ERROR, pathname="", lineno=0,
-        msg="err", args=(), exc_info=exc_info,
-    )
-    filt.filter(record)
-    output = formatter.format(record)
+    record = _record("exc", logging.ERROR, "err", exc_info=exc_info)
+    _FILT.filter(record)
+    output = _JSON.format(record)
     data = json.loads(output)
     assert "exception" in data
     assert "boom" in data["exception"]
@@ -142,17 +177,10 @@ def test_json_formatter_with_exception():
 
 
 def test_console_formatter_output():
-    from src.shared.logging import ConsoleFormatter, SessionFilter, set_session_id
-
     set_session_id("console-test")
-    formatter = ConsoleFormatter()
-    filt = SessionFilter()
-    record = logging.LogRecord(
-        name="mylogger", level=logging.INFO, pathname="", lineno=0,
-        msg="hello world", args=(), exc_info=None,
-    )
-    filt.filter(record)
-    output = formatter.format(record)
+    record = _record("mylogger", msg="hello world")
+    _FILT.filter(record)
+    output = _CONSOLE.format(record)
     assert "INFO" in output
     assert "[console-test]" in output
     assert "mylogger" in output
@@ -160,16 +188,9 @@ def test_console_formatter_output():
 
 
 def test_console_formatter_no_session():
-    from src.shared.logging import ConsoleFormatter, SessionFilter
-
-    formatter = ConsoleFormatter()
-    filt = SessionFilter()
-    record = logging.LogRecord(
-        name="mylogger", level=logging.DEBUG, pathname="", lineno=0,
-        msg="no session", args=(), exc_info=None,
-    )
-    filt.filter(record)
-    output = formatter.format(record)
+    record = _record("mylogger", logging.DEBUG, "no session")
+    _FILT.filter(record)
+    output = _CONSOLE.format(record)
     assert "[" not in output or "[]" not in output
     assert "mylogger" in output
     assert "no session" in output
@@ -181,10 +202,6 @@ def test_console_formatter_no_session():
 
 
 def test_get_tracer_returns_tracer():
-    from opentelemetry import trace
-
-    from src.shared.logging import get_tracer
-
     tracer = get_tracer("test")
     assert isinstance(tracer, trace.Tracer)
 
@@ -194,29 +211,30 @@ def test_get_tracer_returns_tracer():
 # ---------------------------------------------------------------------------
 
 
+@pytest.mark.usefixtures("_reset_handlers")
 def test_log_level_from_settings(monkeypatch):
-    from src.shared import config
-    from src.shared.logging import setup_logging
-
-    monkeypatch.setattr(config.settings, "log_level", "WARNING")
+    monkeypatch.setattr(
+        log_mod, "settings", config.settings.model_copy(update={"log_level": "WARNING"})
+    )
     setup_logging()
     root = logging.getLogger()
     assert root.level == logging.WARNING
 
 
+def test_settings_are_immutable():
+    with pytest.raises(pydantic.ValidationError):
+        settings.log_level = "ERROR"
+
+
 # ---------------------------------------------------------------------------
-# SessionIdSpanProcessor
+# Session ID span processor
 # ---------------------------------------------------------------------------
 
 
 def test_session_id_span_processor_sets_attribute():
     """Verify session.id is set on a span when a session ID is active."""
-    from unittest.mock import MagicMock
-
-    from src.shared.logging import SessionIdSpanProcessor, set_session_id
-
     set_session_id("test-session-42")
-    processor = SessionIdSpanProcessor()
+    processor = log_mod._session_id_span_processor()
     span = MagicMock()
     processor.on_start(span)
     span.set_attribute.assert_called_once_with("session.id", "test-session-42")
@@ -224,51 +242,81 @@ def test_session_id_span_processor_sets_attribute():
 
 def test_session_id_span_processor_no_session():
     """No attribute should be set when session ID is empty."""
-    from unittest.mock import MagicMock
-
-    from src.shared.logging import SessionIdSpanProcessor
-
-    processor = SessionIdSpanProcessor()
+    processor = log_mod._session_id_span_processor()
     span = MagicMock()
     processor.on_start(span)
     span.set_attribute.assert_not_called()
 
 
-def test_session_id_in_exported_spans():
-    """End-to-end: session.id appears in spans captured by a collecting exporter."""
-    from opentelemetry.sdk.trace import TracerProvider
-    from opentelemetry.sdk.trace.export import (
-        SimpleSpanProcessor,
-        SpanExporter,
-        SpanExportResult,
-    )
+def test_session_id_processor_is_a_span_processor():
+    assert isinstance(log_mod._session_id_span_processor(), SpanProcessor)
 
-    from src.shared.logging import SessionIdSpanProcessor, set_session_id
 
-    class CollectingExporter(SpanExporter):
-        def __init__(self):
-            self.spans = []
+def test_import_does_not_load_otel_sdk():
+    code = (
+        "import sys, src.shared.logging; "
+        "sys.exit('opentelemetry.sdk.trace' in sys.modules)"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=_REPO_ROOT, check=False)
+    assert result.returncode == 0
 
-        def export(self, spans):
-            self.spans.extend(spans)
-            return SpanExportResult.SUCCESS
 
-    exporter = CollectingExporter()
+@pytest.fixture(scope="module")
+def provider_and_exporter():
+    """One SDK provider wired like the app's, capturing spans in memory."""
     provider = TracerProvider()
-    provider.add_span_processor(SessionIdSpanProcessor())
+    provider.add_span_processor(log_mod._session_id_span_processor())
+    exporter = InMemorySpanExporter()
     provider.add_span_processor(SimpleSpanProcessor(exporter))
+    yield provider, exporter
+    provider.shutdown()
+
 
-    tracer = provider.get_tracer("test")
+def test_session_id_in_exported_spans(provider_and_exporter):
+    """End-to-end: session.id appears in spans captured by an in-memory exporter."""
+    provider, exporter = provider_and_exporter
+    exporter.clear()
     set_session_id("e2e-session")
 
-    with tracer.start_as_current_span("test_span"):
+    with provider.get_tracer("test").start_as_current_span("test_span"):
         pass
 
-    assert len(exporter.spans) == 1
-    attrs = dict(exporter.spans[0].attributes or {})
+    (span,) = exporter.get_finished_spans()
+    attrs = dict(span.attributes or {})
     assert attrs["session.id"] == "e2e-session"
 
-    provider.shutdown()
+
+def test_no_session_id_in_exported_spans(provider_and_exporter):
+    provider, exporter = provider_and_exporter
+    exporter.clear()
+
+    with provider.get_tracer("test").start_as_current_span("test_span"):
+        pass
+
+    (span,) = exporter.get_finished_spans()
+    assert "session.id" not in (span.attributes or {})
+
+
+def test_console_tracing_uses_batch_processor(monkeypatch):
+    """Console-only tracing must not export synchronously on span end."""
+    monkeypatch.delenv("OTEL_EXPORTER_OTLP_ENDPOINT", raising=False)
+    monkeypatch.setattr(
+        log_mod,
+        "settings",
+        config.settings.model_copy(
+            update={"log_format": "console", "otel_exporter_endpoint": "", "phoenix_enabled": False}
+        ),
+    )
+    with (
+        patch("opentelemetry.sdk.trace.export.BatchSpanProcessor") as batch_processor,
+        patch("src.shared.logging.trace.set_tracer_provider") as set_provider,
+    ):
+        log_mod._init_tracer_provider()
+
+    batch_processor.assert_called_once()
+    (exporter,) = batch_processor.call_args.args
+    assert isinstance(exporter, ConsoleSpanExporter)
+    set_provider.call_args.args[0].shutdown()
 
 
 # ---------------------------------------------------------------------------
@@ -278,10 +326,6 @@ def test_session_id_in_exported_spans():
 
 def test_shutdown_tracing_calls_provider_shutdown():
     """shutdown_tracing should call provider.shutdown() when available."""
-    from unittest.mock import MagicMock, patch
-
-    from src.shared.logging import shutdown_tracing
-
     mock_provider = MagicMock()
     with patch("src.shared.logging.trace.get_tracer_provider", return_value=mock_provider):
         shutdown_tracing()
@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+import pytest
+
 from src.shared.config import settings
 from src.shared.models import (
     ProductResult,
@@ -19,34 +21,48 @@ def test_seller_model():
     assert seller.price == 299.99
 
 
-def test_product_result_model():
-    product = ProductResult(
-        name="Test Fridge",
-        model_id="FR-100",
-        brand="TestBrand",
-        product_type="refrigerator",
-        category="kitchen appliances",
-        criteria={"noise_level": "35dB", "energy_rating": "A++"},
-        sellers=[Seller(name="Store A", price=500)],
-    )
-    assert product.name == "Test Fridge"
-    assert product.model_id == "FR-100"
-    assert product.brand == "TestBrand"
-    assert product.product_type == "refrigerator"
-    assert product.category == "kitchen appliances"
-    assert len(product.sellers) == 1
-    assert product.criteria["noise_level"] == "35dB"
-
-
-def test_product_result_defaults():
-    product = ProductResult(name="Minimal Product")
-    assert product.model_id is None
-    assert product.brand is None
-    assert product.product_type is None
-    assert product.category is None
-    assert product.criteria == {}
-    assert product.sellers == []
-    assert product.image_url is None
+_PRODUCT = ProductResult(
+    name="Test Fridge",
+    model_id="FR-100",
+    brand="TestBrand",
+    product_type="refrigerator",
+    category="kitchen appliances",
+    criteria={"noise_level": "35dB", "energy_rating": "A++"},
+    sellers=[Seller(name="Store A", price=500)],
+)
+_MINIMAL_PRODUCT = ProductResult(name="Minimal Product")
+
+
+@pytest.mark.parametrize(
+    ("attr", "expected"),
+    [
+        ("name", "Test Fridge"),
+        ("model_id", "FR-100"),
+        ("brand", "TestBrand"),
+        ("product_type", "refrigerator"),
+        ("category", "kitchen appliances"),
+        ("criteria", {"noise_level": "35dB", "energy_rating": "A++"}),
+        ("sellers", [Seller(name="Store A", price=500)]),
+    ],
+)
+def test_product_result_model(attr, expected):
+    assert getattr(_PRODUCT, attr) == expected
+
+
+@pytest.mark.parametrize(
+    ("attr", "expected"),
+    [
+        ("model_id", None),
+        ("brand", None),
+        ("product_type", None),
+        ("category", None),
+        ("criteria", {}),
+        ("sellers", []),
+        ("image_url", None),
+    ],
+)
+def test_product_result_defaults(attr, expected):
+    assert getattr(_MINIMAL_PRODUCT, attr) == expected
 
 
 def test_search_request_defaults():